@@ -7,44 +7,128 @@ import yaml
 import json
 import requests
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Sequence, TextIO
 import logging
-import schedule
 import time
+import contextvars
+import functools
+import heapq
+import hashlib
+import re
+import multiprocessing
+import signal
+import sqlite3
+import threading
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from dataclasses import dataclass
 
+from batch_pipeline import BatchPipeline, InvalidRecord, iter_upload_records
+from config_loader import DEFAULT_SNAPSHOT_DIR, EnvResolver, load_config
+from content_templates import ContentTemplates
+from generation_cache import GenerationCache, generation_key
+from http_transport import HTTPTransport
+from job_queue import JobWorker, open_job_queue
+from media_pipeline import MediaProcessor, media_files
+from metrics import MetricsRegistry, MetricsServer
+from metrics_store import GA4MetricsStore
+from openai_batch import OpenAIBatchClient
+from ranking_history import RankingHistory, RankingHistoryStore
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from results_store import ResultsStore
+from retry import RetryBudget, RetryPolicy, RetryLater, IDEMPOTENT_METHODS, current_budget, parse_retry_after
+from scheduler import Scheduler, ScheduledJob, spread
+from semrush_stream import KeywordRanking, iter_domain_organic
+from workflow_engine import WorkflowEngine, WorkflowRun
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# WorkflowConfig fields each provider needs before it can be called
+PROVIDER_CREDENTIALS = {
+    'wordpress': ('wordpress_url', 'wordpress_api_key'),
+    'google_business_profile': ('gbp_business_id', 'gbp_access_token'),
+    'semrush': ('semrush_api_key',),
+    'google_analytics_4': ('ga4_property_id', 'ga4_access_token'),
+    'openai': ('openai_api_key',),
+    'looker_studio': ('looker_studio_report_id',)
+}
+
 @dataclass
 class WorkflowConfig:
-    """Configuration for automation workflow"""
+    """Configuration for automation workflow.
+
+    Slots are declared by hand (dataclass(slots=True) needs Python 3.10), which
+    rules out field defaults; get_client_config passes every field.
+    """
+    __slots__ = ('client_id', 'wordpress_url', 'wordpress_api_key', 'gbp_business_id', 'gbp_access_token',
+                 'semrush_api_key', 'ga4_property_id', 'ga4_access_token', 'openai_api_key',
+                 'looker_studio_report_id')
     client_id: str
-    wordpress_url: Optional[str] = None
-    wordpress_api_key: Optional[str] = None
-    gbp_business_id: Optional[str] = None
-    gbp_access_token: Optional[str] = None
-    semrush_api_key: Optional[str] = None
-    ga4_property_id: Optional[str] = None
-    ga4_access_token: Optional[str] = None
-    openai_api_key: Optional[str] = None
-    looker_studio_report_id: Optional[str] = None
+    wordpress_url: Optional[str]
+    wordpress_api_key: Optional[str]
+    gbp_business_id: Optional[str]
+    gbp_access_token: Optional[str]
+    semrush_api_key: Optional[str]
+    ga4_property_id: Optional[str]
+    ga4_access_token: Optional[str]
+    openai_api_key: Optional[str]
+    looker_studio_report_id: Optional[str]
+
+    def has_credentials(self, provider: str) -> bool:
+        """Whether every credential the provider needs is set (after ${VAR} expansion)"""
+        return all(getattr(self, field) for field in PROVIDER_CREDENTIALS[provider])
+
+def instrumented(provider: str, operation: str):
+    """Record latency/outcome of a provider method taking client_config first, labelled by client"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, client_config: WorkflowConfig, *args, **kwargs):
+            with self.metrics.call(provider, operation, client_config.client_id):
+                return method(self, client_config, *args, **kwargs)
+        return wrapper
+    return decorate
 
 class SEOAutomationWorkflow:
     """Main workflow engine for SEO automation"""
 
-    def __init__(self, config_file: str):
+    def __init__(self, config_file: str, max_workers: Optional[int] = None,
+                 use_cache: bool = True, refresh: bool = False, env_file: Optional[str] = '.env',
+                 config_snapshot: bool = True):
         self.config_file = config_file
+        self.config_snapshot_dir = DEFAULT_SNAPSHOT_DIR if config_snapshot else None
+        self.env = EnvResolver(env_file)
         self.config = self.load_config()
-        self.session = requests.Session()
+        self.client_configs: Dict[str, WorkflowConfig] = {}
+        self.metrics = MetricsRegistry.from_config(self.config)
+        self.max_workers = max_workers or self.config.get('global', {}).get('max_workers', 8)
+        self.transport = HTTPTransport(self.config, self.max_workers)
+        self.rate_limiter = RateLimiter(self.config)
+        self.retry_policy = RetryPolicy.from_config(self.config)
+        self.cache = ResponseCache.from_config(self.config, refresh=refresh) if use_cache else None
+        self.generation_cache = GenerationCache.from_config(self.config) if use_cache else None
+        self.content_templates = ContentTemplates(os.path.join(
+            os.path.dirname(os.path.abspath(config_file)),
+            self.config.get('global', {}).get('content_templates', 'content_templates.yaml')
+        ))
+        self.metrics_store = GA4MetricsStore.from_config(self.config)
+        self.ranking_history = RankingHistoryStore.from_config(self.config)
+        self.results_store = ResultsStore.from_config(self.config)
+        self.media = MediaProcessor.from_config(self.config)
+        self.workflow_engine = WorkflowEngine(
+            self.config.get('workflows', {}), self.step_handlers(),
+            max_workers=self.config.get('global', {}).get('workflow_step_workers', 4),
+            observer=self.observe_step
+        )
 
     def load_config(self) -> Dict[str, Any]:
-        """Load workflow configuration from YAML file"""
+        """Load workflow configuration from YAML file (or its unchanged snapshot)"""
         try:
-            with open(self.config_file, 'r') as f:
-                return yaml.safe_load(f)
+            return load_config(self.config_file, self.config_snapshot_dir, self.env)
         except FileNotFoundError:
             logger.error(f"Configuration file {self.config_file} not found")
             raise
@@ -52,12 +136,186 @@ class SEOAutomationWorkflow:
             logger.error(f"Error parsing YAML configuration: {e}")
             raise
 
+    def request(self, provider: str, method: str, url: str,
+                idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """Send an API request through the provider's rate limiter, retrying transient failures
+
+        Short backoffs are slept inline; longer ones (large Retry-After values)
+        raise RetryLater so the caller can re-queue the job instead of holding
+        a worker thread. Under an active RetryBudget (a deferred or queued
+        job) counting starts at the retries the job already spent, so one
+        failing call is tried at most max_retries + 1 times in all.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        policy = self.retry_policy
+        budget = current_budget()
+        attempt = budget.spent if budget is not None else 0
+
+        while True:
+            body = kwargs.get('data')
+            if attempt and hasattr(body, 'seek'):
+                body.seek(0)  # a streamed file body was consumed by the failed attempt
+
+            waited = self.rate_limiter.acquire(provider, url)
+            if waited:
+                logger.debug(f"Waited {waited:.3f}s for {provider} rate limit token")
+
+            started = time.perf_counter()
+            try:
+                response = self.transport.request(provider, method, url, **kwargs)
+            except requests.RequestException as e:
+                self.record_http(provider, type(e).__name__, time.perf_counter() - started)
+                if not policy.is_retryable_exception(e, idempotent):
+                    raise
+                if attempt >= policy.max_retries:
+                    if budget is not None:
+                        budget.exhausted = True
+                    raise
+                attempt += 1
+                self.metrics.inc('seo_http_retries_total', provider=provider, client=self.metrics.current_client)
+                logger.warning(f"{provider} request failed ({e}), retry {attempt}/{policy.max_retries}")
+                policy.wait(attempt, None, f"{provider} request failed: {e}")
+                continue
+
+            self.record_http(provider, response.status_code, time.perf_counter() - started, response,
+                             streamed=kwargs.get('stream', False))
+            if response.ok:
+                return response
+            retryable = policy.is_retryable_response(response, idempotent)
+            if attempt >= policy.max_retries or not retryable:
+                if retryable and budget is not None:
+                    budget.exhausted = True
+                reason = self.api_error_reason(provider, response.status_code)
+                logger.error(f"{provider} request failed with {response.status_code}: {reason}")
+                return response
+
+            # A streamed response keeps its pooled connection checked out until closed
+            response.close()
+            attempt += 1
+            self.metrics.inc('seo_http_retries_total', provider=provider, client=self.metrics.current_client)
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            logger.warning(
+                f"{provider} returned {response.status_code}, retry {attempt}/{policy.max_retries}"
+            )
+            policy.wait(attempt, retry_after, f"{provider} returned {response.status_code}")
+
+    def record_http(self, provider: str, status: Any, elapsed: float,
+                    response: Optional[requests.Response] = None, streamed: bool = False):
+        """Per-attempt HTTP metrics; sent bytes come from Content-Length.
+
+        Received bytes are the already-read body of ordinary responses; a
+        streamed body is counted by its reader (record_received) as it is consumed.
+        """
+        if not self.metrics.enabled:
+            return
+        client = self.metrics.current_client
+        self.metrics.inc('seo_http_requests_total', provider=provider, client=client, status=status)
+        self.metrics.observe('seo_http_request_seconds', elapsed, provider=provider, client=client)
+        if response is None:
+            return
+        # Content-Length also covers file bodies that were streamed rather than held in memory
+        sent = int(response.request.headers.get('Content-Length') or 0) if response.request is not None else 0
+        if sent:
+            self.metrics.inc('seo_http_sent_bytes_total', sent, provider=provider, client=client)
+        if not streamed:  # reading a streamed body here would defeat streaming
+            self.record_received(provider, len(response.content or b''))
+
+    def record_received(self, provider: str, size: int):
+        if self.metrics.enabled:
+            self.metrics.inc('seo_http_received_bytes_total', size, provider=provider,
+                             client=self.metrics.current_client)
+
+    def start_metrics_server(self, port: Optional[int] = None) -> Optional[MetricsServer]:
+        """Serve /metrics and /metrics.json on monitoring.metrics_port (or `port`); 0 disables"""
+        monitoring = self.config.get('monitoring', {}) or {}
+        port = monitoring.get('metrics_port', 0) if port is None else port
+        if not port or not self.metrics.enabled:
+            return None
+        try:
+            return MetricsServer(self.metrics, monitoring.get('metrics_host', '127.0.0.1'), port).start()
+        except OSError as e:
+            logger.error(f"Could not start metrics server on port {port}: {e}")
+            return None
+
+    def dump_metrics(self, path: Optional[str] = None):
+        """Write the metrics snapshot as JSON to `path` or monitoring.metrics_json"""
+        path = path or (self.config.get('monitoring', {}) or {}).get('metrics_json')
+        if path and self.metrics.enabled:
+            self.metrics.dump(path)
+
+    def record_cache_lookup(self, cache: str, provider: str, hit: bool):
+        self.metrics.inc('seo_cache_lookups_total', cache=cache, provider=provider,
+                         client=self.metrics.current_client, result='hit' if hit else 'miss')
+
+    def observe_step(self, step, context: Dict[str, Any], elapsed: float, error: Optional[BaseException]):
+        """WorkflowEngine observer: latency and outcome of every workflow step"""
+        client = context.get('client_id')
+        self.metrics.observe('seo_workflow_step_seconds', elapsed, step=step.name, type=step.type, client=client)
+        self.metrics.inc('seo_workflow_steps_total', step=step.name, type=step.type, client=client,
+                         outcome='error' if error is not None else 'ok')
+
+    def persist(self, client_id: str, save: str, *args) -> Optional[int]:
+        """Write results with ResultsStore.<save>, returning rows changed.
+
+        Database errors are logged rather than raised: the API work they
+        record has already happened and re-running the job would repeat it.
+        """
+        if self.results_store is None:
+            return None
+        try:
+            return getattr(self.results_store, save)(client_id, *args)
+        except sqlite3.Error as e:
+            hint = ' (set clients.<id>.database_id to its Client row id)' if 'FOREIGN KEY' in str(e) else ''
+            logger.error(f"Could not {save.replace('_', ' ')} for {client_id}: {e}{hint}")
+            return None
+
+    def api_base_url(self, provider: str, default: str) -> str:
+        """apis.<provider>.base_url without a trailing slash"""
+        return ((self.config.get('apis', {}).get(provider) or {}).get('base_url') or default).rstrip('/')
+
+    def api_error_reason(self, provider: str, status_code: int) -> str:
+        """Describe an API error using error_handling.api_error_codes"""
+        key = {'google_business_profile': 'gbp'}.get(provider, provider)
+        codes = self.config.get('error_handling', {}).get('api_error_codes', {}).get(key, {}) or {}
+        return codes.get(status_code, 'permanent error' if status_code < 500 else 'server error')
+
+    def clients_with_credentials(self, providers: Sequence[str]) -> Dict[str, List[str]]:
+        """Split clients into those with live credentials for any of `providers` and the rest"""
+        configured, skipped = [], []
+        for client_id in self.config.get('clients', {}):
+            client_config = self.get_client_config(client_id)
+            if any(client_config.has_credentials(provider) for provider in providers):
+                configured.append(client_id)
+            else:
+                skipped.append(client_id)
+        return {'configured': configured, 'skipped': skipped}
+
+    def credentials_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider count of clients with live credentials, logged before scheduling"""
+        report = {}
+        for provider in PROVIDER_CREDENTIALS:
+            clients = self.clients_with_credentials([provider])
+            report[provider] = {'configured': len(clients['configured']), 'missing': clients['skipped']}
+            if clients['skipped']:
+                logger.warning(
+                    f"{provider}: {len(clients['skipped'])} of {len(self.config.get('clients', {}))} "
+                    f"clients have no credentials: {', '.join(clients['skipped'][:10])}"
+                )
+        if self.env.missing:
+            logger.warning(f"Unset environment variables: {', '.join(sorted(self.env.missing))}")
+        return report
+
     def get_client_config(self, client_id: str) -> WorkflowConfig:
-        """Get configuration for a specific client"""
+        """Get configuration for a specific client, built once per client on first use"""
+        cached = self.client_configs.get(client_id)
+        if cached is not None:
+            return cached
+
         clients = self.config.get('clients', {})
         client_config = clients.get(client_id, {})
 
-        return WorkflowConfig(
+        return self.client_configs.setdefault(client_id, WorkflowConfig(
             client_id=client_id,
             wordpress_url=client_config.get('wordpress_url'),
             wordpress_api_key=client_config.get('wordpress_api_key'),
@@ -68,19 +326,49 @@ class SEOAutomationWorkflow:
             ga4_access_token=client_config.get('ga4_access_token'),
             openai_api_key=client_config.get('openai_api_key'),
             looker_studio_report_id=client_config.get('looker_studio_report_id')
-        )
+        ))
 
+    @instrumented('openai', 'generate_seo_content')
     def generate_seo_content(self, client_config: WorkflowConfig, upload_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate SEO-optimized content using OpenAI"""
         if not client_config.openai_api_key or client_config.openai_api_key == "sk-placeholder-key-for-demo":
             # Return mock content for demo purposes
             logger.warning("Using mock content generation (no valid OpenAI key)")
-            return self.generate_mock_content(upload_data)
-
-        # Skip API call for demo - just return mock content
-        logger.warning("Skipping OpenAI API call for demo - using mock content")
-        return self.generate_mock_content(upload_data)
+            return self.generate_mock_content(upload_data, client_config.client_id)
+
+        openai_config = self.config.get('apis', {}).get('openai', {})
+        if not openai_config.get('live_generation', False):
+            # Skip API call for demo - just return mock content
+            logger.warning("Skipping OpenAI API call for demo - using mock content")
+            return self.generate_mock_content(upload_data, client_config.client_id)
+
+        model = openai_config.get('model', 'gpt-4-turbo')
+        temperature = openai_config.get('temperature', 0.7)
+        if self.generation_cache is None:
+            return self.request_openai_content(client_config, upload_data)
+
+        key = generation_key(client_config.client_id, upload_data, model, temperature)
+        generated = []
+
+        def generate():
+            generated.append(True)
+            return self.request_openai_content(client_config, upload_data)
+
+        content = self.generation_cache.get_or_generate(key, generate)
+        self.record_cache_lookup('generation', 'openai', hit=not generated)
+        return content
+
+    def uses_live_generation(self, client_config: WorkflowConfig) -> bool:
+        """Whether generate_seo_content would call OpenAI for this client"""
+        return bool(
+            client_config.openai_api_key
+            and client_config.openai_api_key != "sk-placeholder-key-for-demo"
+            and self.config.get('apis', {}).get('openai', {}).get('live_generation', False)
+        )
 
+    def openai_chat_body(self, upload_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completions request body for one upload"""
+        openai_config = self.config.get('apis', {}).get('openai', {})
         prompt = f"""
         Generate SEO-optimized content for:
         Type: {upload_data['type']}
@@ -92,95 +380,141 @@ class SEOAutomationWorkflow:
         Return JSON with: title, metaDescription, content, schemaJson, hashtags, gbpSummary
         """
 
+        return {
+            'model': openai_config.get('model', 'gpt-4-turbo'),
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': openai_config.get('temperature', 0.7),
+            'max_tokens': openai_config.get('max_tokens', 2500)
+        }
+
+    def request_openai_content(self, client_config: WorkflowConfig, upload_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the chat completions API for one upload"""
         headers = {
             'Authorization': f'Bearer {client_config.openai_api_key}',
             'Content-Type': 'application/json'
         }
 
-        data = {
-            'model': 'gpt-4-turbo',
-            'messages': [{'role': 'user', 'content': prompt}],
-            'temperature': 0.7,
-            'max_tokens': 2500
-        }
-
-        response = self.session.post(
-            'https://api.openai.com/v1/chat/completions',
+        response = self.request(
+            'openai', 'POST',
+            f"{self.api_base_url('openai', 'https://api.openai.com/v1')}/chat/completions",
             headers=headers,
-            json=data
+            json=self.openai_chat_body(upload_data)
         )
         response.raise_for_status()
 
         content = response.json()['choices'][0]['message']['content']
         return json.loads(content)
 
-    def generate_mock_content(self, upload_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate mock content for demo purposes"""
-        title = f"Complete Guide to {upload_data['service']} in {upload_data['location']}"
-        meta_description = f"Professional {upload_data['service']} services in {upload_data['location']}. Expert craftsmanship, quality materials, and exceptional results."
+    def generate_seo_content_batch(self, items: List[Any], deadline: Optional[float] = None) -> Dict[str, int]:
+        """Generate content for many (client_config, upload_data) pairs with OpenAI batch jobs.
 
-        content = f"""
-# {title}
-
-Are you looking for professional {upload_data['service']} services in {upload_data['location']}? Look no further! Our expert team specializes in delivering high-quality {upload_data['service']} solutions that exceed expectations.
-
-## Why Choose Our {upload_data['service']} Services?
-
-- **Expert Craftsmanship**: Years of experience in {upload_data['service']}
-- **Quality Materials**: Only the best materials and equipment
-- **Local Expertise**: Serving {upload_data['location']} and surrounding areas
-- **Customer Satisfaction**: 100% satisfaction guarantee
-
-## Recent Project: {upload_data['title']}
-
-{upload_data['description']}
-
-This project showcases our commitment to excellence and attention to detail. Every aspect of the {upload_data['service']} was carefully planned and executed to perfection.
-
-## Our {upload_data['service']} Process
-
-1. **Initial Consultation**: Understanding your vision and requirements
-2. **Design Phase**: Creating detailed plans and specifications
-3. **Execution**: Professional implementation with quality control
-4. **Final Inspection**: Ensuring everything meets our high standards
-5. **Follow-up**: Ongoing support and maintenance
-
-## Contact Us Today
-
-Ready to transform your space with professional {upload_data['service']}? Contact our team in {upload_data['location']} today for a free consultation.
-
-Call us at (555) 123-4567 or visit our website to learn more about our services.
-"""
-
-        schema_json = json.dumps({
-            "@context": "https://schema.org",
-            "@type": "Article",
-            "headline": title,
-            "description": meta_description,
-            "author": {
-                "@type": "Organization",
-                "name": "ABC Construction"
-            },
-            "publisher": {
-                "@type": "Organization",
-                "name": "ABC Construction"
-            },
-            "datePublished": "2024-01-15",
-            "mainEntityOfPage": {
-                "@type": "WebPage",
-                "@id": "https://abcconstruction.com/blog"
-            }
-        })
-
-        return {
-            "title": title,
-            "metaDescription": meta_description,
-            "content": content.strip(),
-            "schemaJson": schema_json,
-            "hashtags": ["construction", "renovation", "homeimprovement", upload_data['service'].lower().replace(' ', '')],
-            "gbpSummary": f"Completed {upload_data['service']} project in {upload_data['location']}. Professional craftsmanship with quality materials. Free consultation available."
-        }
+        Results are primed into the generation cache, so the regular
+        generate_seo_content call for each upload is then a cache hit.
+        Uploads already cached, or not using live generation, are skipped.
+        Jobs not finished by `deadline` (time.monotonic()) are cancelled and
+        their uploads generated per upload instead.
+        """
+        if self.generation_cache is None:
+            logger.warning("OpenAI batch generation needs the generation cache; generating per upload")
+            return {'submitted': 0, 'generated': 0, 'failed': 0}
+
+        openai_config = self.config.get('apis', {}).get('openai', {})
+        batch_config = openai_config.get('batch', {}) or {}
+        model = openai_config.get('model', 'gpt-4-turbo')
+        temperature = openai_config.get('temperature', 0.7)
+
+        # One batch job per API key; identical uploads are submitted once
+        jobs: Dict[str, Dict[str, Any]] = {}
+        for client_config, upload_data in items:
+            if not self.uses_live_generation(client_config):
+                continue
+            key = generation_key(client_config.client_id, upload_data, model, temperature)
+            if self.generation_cache.contains(key):
+                continue
+            job = jobs.setdefault(client_config.openai_api_key, {'requests': {}, 'keys': {}})
+            custom_id = self.generation_cache.digest(key)
+            job['requests'][custom_id] = self.openai_chat_body(upload_data)
+            job['keys'][custom_id] = key
+
+        counts = {'submitted': 0, 'generated': 0, 'failed': 0}
+        for api_key, job in jobs.items():
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"OpenAI batch wait exhausted, generating {len(job['requests'])} uploads per upload")
+                counts['failed'] += len(job['requests'])
+                continue
+            client = OpenAIBatchClient(
+                lambda method, url, **kwargs: self.request('openai', method, url, **kwargs),
+                self.api_base_url('openai', 'https://api.openai.com/v1'), api_key,
+                poll_interval=batch_config.get('poll_interval_seconds', 5),
+                max_poll_interval=batch_config.get('max_poll_interval_seconds', 60),
+                max_wait=batch_config.get('max_wait_seconds', 3600)
+            )
+            counts['submitted'] += len(job['requests'])
+            try:
+                results = client.run(job['requests'], deadline)
+            except Exception as e:
+                logger.error(f"OpenAI batch job failed, falling back to per-upload generation: {e}")
+                counts['failed'] += len(job['requests'])
+                continue
+
+            for custom_id, body in results.items():
+                try:
+                    if isinstance(body, Exception):
+                        raise body
+                    content = json.loads(body['choices'][0]['message']['content'])
+                except Exception as e:
+                    logger.warning(f"Batch generation {custom_id[:12]} failed: {e}")
+                    counts['failed'] += 1
+                    continue
+                self.generation_cache.prime(job['keys'][custom_id], content)
+                counts['generated'] += 1
+
+        if counts['submitted']:
+            logger.info(f"OpenAI batch generation: {counts}")
+        return counts
+
+    def pregenerate_batches(self, records: Iterator[Dict[str, Any]], default_client: Optional[str],
+                            size: int, max_wait: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Pass records through unchanged, batch-generating content one chunk ahead of the pipeline.
+
+        Waiting on batch jobs holds back the records behind them, so it is
+        capped at max_wait seconds for the whole run; records after that
+        are generated synchronously by the pipeline.
+        """
+        chunk: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + max_wait if max_wait is not None else None
+
+        def flush():
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            items = []
+            for record in chunk:
+                client_id = record.get('client_id') or record.get('client') or default_client
+                if client_id in self.config.get('clients', {}):
+                    items.append((self.get_client_config(client_id), record))
+            self.generate_seo_content_batch(items, deadline)
+
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= size:
+                flush()
+                yield from chunk
+                chunk = []
+        if chunk:
+            flush()
+            yield from chunk
+
+    def generate_mock_content(self, upload_data: Dict[str, Any], client_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate mock content for demo purposes from the client's industry template"""
+        client_info = self.config.get('clients', {}).get(client_id, {}) if client_id else {}
+        return self.content_templates.render(
+            upload_data,
+            industry=client_info.get('industry'),
+            business_name=client_info.get('name'),
+            website=client_info.get('website')
+        )
 
+    @instrumented('wordpress', 'publish')
     def publish_to_wordpress(self, client_config: WorkflowConfig, content: Dict[str, Any]) -> Dict[str, Any]:
         """Publish content to WordPress"""
         if not client_config.wordpress_url or not client_config.wordpress_api_key:
@@ -213,8 +547,11 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
                 'schema': content['schemaJson']
             }
         }
+        if content.get('featured_media'):
+            post_data['featured_media'] = content['featured_media']
 
-        response = self.session.post(
+        response = self.request(
+            'wordpress', 'POST',
             f"{client_config.wordpress_url}/wp-json/wp/v2/posts",
             headers=headers,
             json=post_data
@@ -223,6 +560,7 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
 
         return response.json()
 
+    @instrumented('google_business_profile', 'publish')
     def publish_to_gbp(self, client_config: WorkflowConfig, content: Dict[str, Any]) -> Dict[str, Any]:
         """Publish condensed content to Google Business Profile"""
         if not client_config.gbp_business_id or not client_config.gbp_access_token:
@@ -255,9 +593,13 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
                 'url': content.get('wordpress_url', '')
             }
         }
+        if content.get('image_url'):
+            post_data['media'] = [{'mediaFormat': 'PHOTO', 'sourceUrl': content['image_url']}]
 
-        response = self.session.post(
-            f"https://mybusiness.googleapis.com/v4/accounts/0/locations/{client_config.gbp_business_id}/posts",
+        response = self.request(
+            'google_business_profile', 'POST',
+            f"{self.api_base_url('google_business_profile', 'https://mybusiness.googleapis.com/v4')}"
+            f"/accounts/0/locations/{client_config.gbp_business_id}/posts",
             headers=headers,
             json=post_data
         )
@@ -265,14 +607,181 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
 
         return response.json()
 
-    def check_keyword_rankings(self, client_config: WorkflowConfig, domain: str) -> List[Dict[str, Any]]:
-        """Check keyword rankings using SEMrush"""
+    @instrumented('wordpress', 'upload_media')
+    def upload_wordpress_media(self, client_config: WorkflowConfig, media: Dict[str, Any],
+                               alt_text: str) -> Dict[str, Any]:
+        """Stream one prepared photo to the WordPress media library"""
+        if not client_config.wordpress_url or not client_config.wordpress_api_key:
+            logger.warning("WordPress not configured, skipping media upload")
+            return {}
+
+        filename = re.sub(r'[^A-Za-z0-9._-]+', '-', os.path.basename(media['path']))
+
+        # Mock WordPress media upload for demo
+        if client_config.wordpress_api_key.startswith('wp_demo_key'):
+            logger.info(f"Mock WordPress media upload of {filename} (no real API key)")
+            return {
+                'id': 67890,
+                'source_url': f"{client_config.wordpress_url}/wp-content/uploads/{filename}",
+                'media_type': 'image',
+                'mime_type': media['content_type']
+            }
+
+        headers = {
+            'Authorization': f'Bearer {client_config.wordpress_api_key}',
+            'Content-Type': media['content_type'],
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }
+
+        # The open file is sent in blocks rather than read into memory
+        with open(media['path'], 'rb') as body:
+            response = self.request(
+                'wordpress', 'POST',
+                f"{client_config.wordpress_url}/wp-json/wp/v2/media",
+                headers=headers,
+                params={'alt_text': alt_text, 'title': alt_text},
+                data=body
+            )
+        response.raise_for_status()
+
+        return response.json()
+
+    @instrumented('google_business_profile', 'upload_media')
+    def upload_gbp_media(self, client_config: WorkflowConfig, media: Dict[str, Any],
+                         description: str) -> Dict[str, Any]:
+        """Upload one prepared photo to the GBP location: startUpload, stream the bytes, create the item"""
+        if not client_config.gbp_business_id or not client_config.gbp_access_token:
+            logger.warning("GBP not configured, skipping media upload")
+            return {}
+
+        # Mock GBP media upload for demo
+        if client_config.gbp_access_token.startswith('gbp_demo_token'):
+            logger.info("Mock GBP media upload (no real API key)")
+            return {
+                'name': f"accounts/0/locations/{client_config.gbp_business_id}/media/mock_media_123",
+                'mediaFormat': 'PHOTO',
+                'description': description
+            }
+
+        gbp_config = self.config.get('apis', {}).get('google_business_profile', {})
+        parent = (f"{self.api_base_url('google_business_profile', 'https://mybusiness.googleapis.com/v4')}"
+                  f"/accounts/0/locations/{client_config.gbp_business_id}")
+        headers = {
+            'Authorization': f'Bearer {client_config.gbp_access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        response = self.request('google_business_profile', 'POST', f"{parent}/media:startUpload",
+                                headers=headers, json={})
+        response.raise_for_status()
+        resource_name = response.json()['resourceName']
+
+        upload_url = gbp_config.get('upload_url', 'https://mybusiness.googleapis.com/upload/v1/media')
+        with open(media['path'], 'rb') as body:
+            response = self.request(
+                'google_business_profile', 'POST', f"{upload_url}/{resource_name}",
+                headers={'Authorization': headers['Authorization'], 'Content-Type': media['content_type']},
+                params={'upload_type': 'media'},
+                data=body
+            )
+        response.raise_for_status()
+
+        response = self.request('google_business_profile', 'POST', f"{parent}/media", headers=headers, json={
+            'mediaFormat': 'PHOTO',
+            'locationAssociation': {'category': gbp_config.get('photo_category', 'ADDITIONAL')},
+            'dataRef': {'resourceName': resource_name},
+            'description': description
+        })
+        response.raise_for_status()
+
+        return response.json()
+
+    @instrumented('semrush', 'check_keyword_rankings')
+    def check_keyword_rankings(self, client_config: WorkflowConfig, domain: str,
+                               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Check keyword rankings using SEMrush, optionally only the first `limit` rows.
+
+        Served from the head of the day's export in the response cache when
+        it holds enough rows (e.g. the report's top 20 after the daily check
+        streamed the full export); full exports should be consumed with
+        stream_keyword_rankings instead of being held as a list.
+        """
         if not client_config.semrush_api_key:
             logger.warning("SEMrush not configured, skipping ranking check")
             return []
 
+        cached = self.cached_rankings(domain)
+        if cached is not None and (cached['complete'] or (limit and len(cached['rows']) >= limit)):
+            logger.info(f"Using cached SEMrush rankings for {domain}")
+            return cached['rows'][:limit] if limit else cached['rows']
+
+        rankings = [ranking.to_dict() for ranking in self.iter_client_rankings(client_config, domain, limit)]
+        self.cache_rankings(domain, rankings, complete=not limit or len(rankings) < limit)
+        return rankings
+
+    def stream_keyword_rankings(self, client_config: WorkflowConfig, domain: str) -> Iterator[KeywordRanking]:
+        """A domain's full SEMrush export, fetched page by page as it is consumed.
+
+        The first apis.semrush.cached_rows rows are cached as the head of the
+        day's export, so limited lookups for the domain do not fetch it again.
+        """
+        if not client_config.semrush_api_key:
+            logger.warning("SEMrush not configured, skipping ranking check")
+            return
+        cached = self.cached_rankings(domain)
+        if cached is not None and cached['complete']:
+            yield from (KeywordRanking(**row) for row in cached['rows'])
+            return
+        head_rows = self.config.get('apis', {}).get('semrush', {}).get('cached_rows', 100)
+        with self.metrics.call('semrush', 'stream_keyword_rankings', client_config.client_id):
+            head: Optional[List[Dict[str, Any]]] = []
+            for ranking in self.iter_client_rankings(client_config, domain):
+                if head is not None:
+                    head.append(ranking.to_dict())
+                    if len(head) >= head_rows:
+                        self.cache_rankings(domain, head, complete=False)
+                        head = None
+                yield ranking
+            if head is not None:
+                self.cache_rankings(domain, head, complete=True)
+
+    def rankings_cache_params(self, domain: str) -> Dict[str, Any]:
+        """One cache entry per domain, database and day, whatever the row limit"""
+        return {'domain': domain, 'database': self.semrush_database(), 'date': date.today().isoformat()}
+
+    def cached_rankings(self, domain: str) -> Optional[Dict[str, Any]]:
+        """The cached head of today's export: {'rows': [...], 'complete': whether it is the whole export}"""
+        if self.cache is None:
+            return None
+        cached = self.cache.get('semrush', 'domain_organic', self.rankings_cache_params(domain))
+        self.record_cache_lookup('response', 'semrush', hit=cached is not None)
+        return cached
+
+    def cache_rankings(self, domain: str, rows: List[Dict[str, Any]], complete: bool):
+        """Cache at most apis.semrush.cached_rows leading rows of a domain's export"""
+        if self.cache is None:
+            return
+        head_rows = self.config.get('apis', {}).get('semrush', {}).get('cached_rows', 100)
+        self.cache.put('semrush', 'domain_organic', self.rankings_cache_params(domain),
+                       {'rows': rows[:head_rows], 'complete': complete and len(rows) <= head_rows})
+
+    def semrush_database(self) -> str:
+        return self.config.get('apis', {}).get('semrush', {}).get('database', 'us')
+
+    def domain_organic_params(self, client_config: WorkflowConfig, domain: str) -> Dict[str, Any]:
+        return {
+            'type': 'domain_organic',
+            'key': client_config.semrush_api_key,
+            'domain': domain,
+            'db': self.semrush_database(),
+            'export_columns': 'Ph,Po,Nq,Kd,Cp'
+        }
+
+    def iter_client_rankings(self, client_config: WorkflowConfig, domain: str,
+                             limit: Optional[int] = None) -> Iterator[KeywordRanking]:
+        """Rankings for a domain as KeywordRanking rows (mock rows for demo keys)"""
         # Mock SEMrush data for demo
-        if client_config.semrush_api_key.startswith('${') or client_config.semrush_api_key.startswith('semrush_demo_key'):
+        if client_config.semrush_api_key.startswith('semrush_demo_key'):
             logger.info("Mock SEMrush data fetch (no real API key)")
             mock_keywords = [
                 'kitchen renovation springfield',
@@ -282,46 +791,30 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
                 'bathroom remodeling contractor'
             ]
 
-            rankings = []
-            for i, keyword in enumerate(mock_keywords):
-                rankings.append({
-                    'keyword': keyword,
-                    'position': 5 + i,  # Mock positions 5-9
-                    'search_volume': 1000 + (i * 200),
-                    'difficulty': 30 + (i * 5),
-                    'cpc': 2.5 + (i * 0.5)
-                })
-
-            return rankings
-
-        params = {
-            'type': 'domain_organic',
-            'key': client_config.semrush_api_key,
-            'domain': domain,
-            'db': 'us',
-            'export_columns': 'Ph,Po,Nq,Kd,Cp'
-        }
-
-        response = self.session.get('https://api.semrush.com/', params=params)
-        response.raise_for_status()
+            rankings = [
+                KeywordRanking(
+                    keyword,
+                    5 + i,  # Mock positions 5-9
+                    1000 + (i * 200),
+                    30 + (i * 5),
+                    2.5 + (i * 0.5)
+                )
+                for i, keyword in enumerate(mock_keywords)
+            ]
+            return iter(rankings[:limit] if limit else rankings)
 
-        lines = response.text.split('\n')
-        rankings = []
-
-        for line in lines[1:]:  # Skip header
-            if line.strip():
-                parts = line.split('|')
-                if len(parts) >= 5:
-                    rankings.append({
-                        'keyword': parts[0],
-                        'position': int(parts[1]) if parts[1] else 0,
-                        'search_volume': int(parts[2]) if parts[2] else 0,
-                        'difficulty': int(parts[3]) if parts[3] else 0,
-                        'cpc': float(parts[4]) if parts[4] else 0
-                    })
+        return self.iter_keyword_rankings(self.domain_organic_params(client_config, domain), limit)
 
-        return rankings
+    def iter_keyword_rankings(self, params: Dict[str, Any], limit: Optional[int] = None) -> Iterator[KeywordRanking]:
+        """Stream domain_organic rows page by page without buffering the whole export"""
+        page_size = self.config.get('apis', {}).get('semrush', {}).get('page_size', 10000)
+        return iter_domain_organic(
+            lambda url, params: self.request('semrush', 'GET', url, params=params, stream=True),
+            f"{self.api_base_url('semrush', 'https://api.semrush.com')}/", params, page_size=page_size, limit=limit,
+            on_page_read=lambda size: self.record_received('semrush', size)
+        )
 
+    @instrumented('google_analytics_4', 'get_metrics')
     def get_ga4_metrics(self, client_config: WorkflowConfig, days: int = 30) -> List[Dict[str, Any]]:
         """Fetch GA4 analytics metrics"""
         if not client_config.ga4_property_id or not client_config.ga4_access_token:
@@ -353,12 +846,18 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
             'Content-Type': 'application/json'
         }
 
+        property_id = client_config.ga4_property_id
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
 
+        # Only fetch dates newer than the local store (plus the restatement window)
+        fetch_start = start_date
+        if self.metrics_store is not None:
+            fetch_start = self.metrics_store.fetch_start(property_id, start_date)
+
         data = {
             'dateRanges': [{
-                'startDate': start_date.strftime('%Y-%m-%d'),
+                'startDate': fetch_start.strftime('%Y-%m-%d'),
                 'endDate': end_date.strftime('%Y-%m-%d')
             }],
             'dimensions': [{'name': 'date'}],
@@ -372,139 +871,795 @@ Call us at (555) 123-4567 or visit our website to learn more about our services.
             ]
         }
 
-        response = self.session.post(
-            f"https://analyticsdata.googleapis.com/v1beta/properties/{client_config.ga4_property_id}:runReport",
-            headers=headers,
-            json=data
-        )
-        response.raise_for_status()
+        cache_params = {'property_id': property_id, 'body': data}
+        metrics = None
+        if self.cache is not None:
+            metrics = self.cache.get('google_analytics_4', 'runReport', cache_params)
+            self.record_cache_lookup('response', 'google_analytics_4', hit=metrics is not None)
+        if metrics is not None:
+            logger.info(f"Using cached GA4 metrics for property {property_id}")
+        else:
+            response = self.request(
+                'google_analytics_4', 'POST',
+                f"{self.api_base_url('google_analytics_4', 'https://analyticsdata.googleapis.com/v1beta')}"
+                f"/properties/{property_id}:runReport",
+                idempotent=True,  # runReport is a read despite being a POST
+                headers=headers,
+                json=data
+            )
+            response.raise_for_status()
+
+            result = response.json()
+            metrics = []
+
+            for row in result.get('rows', []):
+                metrics.append({
+                    'date': row['dimensionValues'][0]['value'],
+                    'sessions': int(row['metricValues'][0]['value']),
+                    'users': int(row['metricValues'][1]['value']),
+                    'page_views': int(row['metricValues'][2]['value']),
+                    'bounce_rate': float(row['metricValues'][3]['value']),
+                    'avg_session_duration': float(row['metricValues'][4]['value']),
+                    'conversions': int(row['metricValues'][5]['value'])
+                })
 
-        result = response.json()
-        metrics = []
+            if self.cache is not None:
+                self.cache.put('google_analytics_4', 'runReport', cache_params, metrics)
 
-        for row in result.get('rows', []):
-            metrics.append({
-                'date': row['dimensionValues'][0]['value'],
-                'sessions': int(row['metricValues'][0]['value']),
-                'users': int(row['metricValues'][1]['value']),
-                'page_views': int(row['metricValues'][2]['value']),
-                'bounce_rate': float(row['metricValues'][3]['value']),
-                'avg_session_duration': float(row['metricValues'][4]['value']),
-                'conversions': int(row['metricValues'][5]['value'])
-            })
+        if self.metrics_store is not None:
+            self.metrics_store.upsert(property_id, metrics)
+            logger.info(f"Stored {len(metrics)} GA4 days for property {property_id} since {data['dateRanges'][0]['startDate']}")
+            return self.metrics_store.rows(
+                property_id, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+            )
 
         return metrics
 
-    def process_upload(self, client_id: str, upload_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a new content upload through the full automation workflow"""
-        logger.info(f"Processing upload for client {client_id}: {upload_data['title']}")
+    def step_handlers(self) -> Dict[str, Any]:
+        """Implementations for the step types used in the workflows: section"""
+        return {
+            'openai_completion': self.step_generate_content,
+            'media_prepare': self.step_prepare_media,
+            'wordpress_media': self.resumable(self.step_upload_wordpress_media),
+            'gbp_media': self.resumable(self.step_upload_gbp_media),
+            'wordpress_post': self.resumable(self.step_publish_wordpress),
+            'gbp_post': self.resumable(self.step_publish_gbp),
+            'database_save': self.step_store_results,
+            'semrush_domain_organic': self.step_fetch_rankings,
+            'ranking_analysis': self.step_analyze_rankings,
+            'content_reoptimization': self.step_reoptimize_content,
+            'multi_api_fetch': self.step_multi_api_fetch,
+            'report_builder': self.step_build_report,
+            'looker_studio_update': self.step_update_dashboard,
+            'email_notification': self.step_send_notifications
+        }
+
+    @staticmethod
+    def resumable(handler):
+        """Wrap a step with external side effects so a retried job reuses its earlier outputs.
+
+        With `completed_steps` in the context (a queued upload's payload),
+        the step's outputs are recorded there once it succeeds; the worker
+        saves them with the job, and a later attempt returns them instead of
+        publishing again.
+        """
+        @functools.wraps(handler)
+        def run(step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+            completed = context.get('completed_steps')
+            if completed is None:
+                return handler(step, inputs, context)
+            if step['name'] in completed:
+                logger.info(f"{step['name']} already done by an earlier attempt, reusing its result")
+                return completed[step['name']]
+            outputs = handler(step, inputs, context)
+            completed[step['name']] = outputs
+            return outputs
+        return run
+
+    def job_handlers(self) -> Dict[str, Any]:
+        """Map job queue kinds to handlers taking the job payload"""
+        return {
+            'upload': lambda payload: self.process_upload(
+                payload['client_id'], payload['upload'], completed_steps=payload.setdefault('completed_steps', {})
+            ),
+            'ranking_check': lambda payload: self.check_client_rankings(payload['client_id']),
+            'monthly_report': lambda payload: self.run_monthly_report(payload['client_id']),
+            'reoptimization_check': lambda payload: self.analyze_rankings(payload['client_id'])
+        }
+
+    @cached_property
+    def job_queue(self):
+        return open_job_queue(self.config)
+
+    def submit_upload(self, client_id: str, upload_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue an upload for the workers; resubmitting the same upload is a no-op"""
+        if client_id not in self.config.get('clients', {}):
+            raise ValueError(f"Unknown client: {client_id}")
+        upload = dict(upload_data)
+        key = upload.pop('idempotency_key', None) or hashlib.sha256(
+            json.dumps([client_id, upload], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        job_id, created = self.job_queue.enqueue(
+            'upload', {'client_id': client_id, 'upload': upload}, idempotency_key=f"upload:{key}"
+        )
+        return {'job_id': job_id, 'created': created}
 
-        client_config = self.get_client_config(client_id)
+    def submit_upload_batch(self, source: str, output: TextIO,
+                            default_client: Optional[str] = None) -> Dict[str, int]:
+        """Queue every upload in a JSONL file, directory or stdin as it is read.
 
-        # Step 1: Generate SEO content
-        content = self.generate_seo_content(client_config, upload_data)
+        One JSONL line per record ({index, job_id, created} or {index, error})
+        is written to `output`; returns the counts.
+        """
+        counts = {'queued': 0, 'existing': 0, 'invalid': 0}
+        for index, record in enumerate(iter_upload_records(source)):
+            try:
+                if isinstance(record, InvalidRecord):
+                    raise ValueError(f"Invalid record: {record.error}")
+                upload = dict(record)
+                client_id = upload.pop('client_id', None) or upload.pop('client', None) or default_client
+                if not client_id:
+                    raise ValueError("record has no client_id and no --client was given")
+                result = dict(self.submit_upload(client_id, upload), index=index)
+            except ValueError as e:
+                counts['invalid'] += 1
+                result = {'index': index, 'success': False, 'error': str(e)}
+            else:
+                counts['queued' if result['created'] else 'existing'] += 1
+            output.write(json.dumps(result) + '\n')
+        output.flush()
+        logger.info(f"Queued {counts['queued']} uploads ({counts['existing']} already queued, "
+                    f"{counts['invalid']} invalid)")
+        return counts
+
+    def submit_for_all_clients(self, kind: str, run_key: str, providers: Sequence[str] = (),
+                               jitter: float = 0.0) -> Dict[str, Any]:
+        """Queue one `kind` job per client for the run identified by run_key.
+
+        Clients are spread over the jitter window through the job's start
+        delay, and the (kind, client, run_key) idempotency key means a
+        scheduler restarted mid-submission does not queue duplicates.
+        """
+        client_ids = list(self.config.get('clients', {}))
+        skipped: List[str] = []
+        if providers:
+            selection = self.clients_with_credentials(providers)
+            client_ids, skipped = selection['configured'], selection['skipped']
+        created = 0
+        for client_id in client_ids:
+            _, new = self.job_queue.enqueue(
+                kind, {'client_id': client_id},
+                idempotency_key=f"{kind}:{client_id}:{run_key}",
+                delay=spread(f"{kind}:{client_id}", jitter)
+            )
+            created += new
+        logger.info(f"Queued {created} {kind} jobs for {run_key} ({len(client_ids) - created} already queued, "
+                    f"{len(skipped)} clients skipped)")
+        return {'kind': kind, 'run_key': run_key, 'queued': created, 'skipped': skipped}
+
+    def workflow_context(self, client_id: str, **inputs) -> Dict[str, Any]:
+        """Initial step context for a client: automation flags, config and inputs"""
+        client_info = self.config['clients'][client_id]
+        context = dict(client_info.get('automation', {}))
+        context.update(
+            client_id=client_id,
+            client=client_info,
+            client_config=self.get_client_config(client_id),
+            **inputs
+        )
+        return context
+
+    def run_workflow(self, name: str, client_id: str, **inputs) -> WorkflowRun:
+        """Run a workflow from workflow.yaml for one client"""
+        return self.workflow_engine.run(name, self.workflow_context(client_id, **inputs))
+
+    # content_creation steps
+
+    def step_generate_content(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        content = self.generate_seo_content(context['client_config'], context['upload'])
         logger.info("Content generated successfully")
+        return {
+            'generated_content': content,
+            'title': content['title'],
+            'content': content['content'],
+            'meta_description': content['metaDescription'],
+            'schema_json': content['schemaJson'],
+            'hashtags': content.get('hashtags', []),
+            'gbp_summary': content.get('gbpSummary', content['metaDescription'])
+        }
 
-        # Step 2: Publish to WordPress
-        wordpress_result = self.publish_to_wordpress(client_config, content)
-        if wordpress_result:
-            content['wordpress_url'] = wordpress_result.get('link')
-            logger.info(f"Published to WordPress: {content['wordpress_url']}")
+    # Media steps are best-effort: a photo that cannot be prepared or uploaded
+    # is logged and left out, and the posts still publish without it
 
-        # Step 3: Publish to GBP
-        gbp_result = self.publish_to_gbp(client_config, content)
-        if gbp_result:
-            logger.info("Published to Google Business Profile")
+    def step_prepare_media(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            media = self.media.prepare(inputs.get('media_files') or [])
+        except Exception as e:
+            logger.error(f"Could not prepare media for {context['client_id']}, publishing without photos: {e}")
+            return {'prepared_media': []}
+        logger.info(f"Prepared {len(media)} media files")
+        return {'prepared_media': media}
+
+    def step_upload_wordpress_media(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.config.get('apis', {}).get('wordpress', {}).get('media_upload', True):
+            return {'wordpress_media': []}
+        return {'wordpress_media': self.upload_all_media(
+            'WordPress', self.upload_wordpress_media, context['client_config'],
+            inputs.get('prepared_media') or [], inputs['title']
+        )}
+
+    def step_upload_gbp_media(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.config.get('apis', {}).get('google_business_profile', {}).get('media_upload', True):
+            return {'gbp_media': []}
+        return {'gbp_media': self.upload_all_media(
+            'Google Business Profile', self.upload_gbp_media, context['client_config'],
+            inputs.get('prepared_media') or [], inputs['title']
+        )}
+
+    @staticmethod
+    def upload_all_media(destination: str, upload, client_config: WorkflowConfig,
+                         prepared: List[Dict[str, Any]], title: str) -> List[Dict[str, Any]]:
+        """Upload each prepared photo, skipping (and logging) the ones that fail"""
+        uploaded = []
+        for media in prepared:
+            try:
+                item = upload(client_config, media, title)
+            except Exception as e:  # includes RetryLater: the post should not wait on a photo
+                logger.error(f"Could not upload {media['source']} to {destination}, publishing without it: {e}")
+                continue
+            if item:
+                uploaded.append(item)
+        return uploaded
+
+    def step_publish_wordpress(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        media = inputs.get('wordpress_media') or []
+        result = self.publish_to_wordpress(context['client_config'], {
+            'title': inputs['title'],
+            'content': inputs['content'],
+            'metaDescription': inputs['meta_description'],
+            'schemaJson': inputs['schema_json'],
+            'featured_media': media[0].get('id') if media else None
+        })
+        if not result:
+            return {'wordpress_result': result}
+        logger.info(f"Published to WordPress: {result.get('link')}")
+        return {
+            'wordpress_result': result,
+            'wordpress_post_id': result.get('id'),
+            'wordpress_url': result.get('link')
+        }
 
-        # Step 4: Return results
+    def step_publish_gbp(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        media = inputs.get('wordpress_media') or []
+        result = self.publish_to_gbp(context['client_config'], {
+            'gbpSummary': inputs['gbp_summary'],
+            'hashtags': inputs.get('hashtags') or [],
+            'wordpress_url': inputs.get('wordpress_url') or '',
+            'image_url': media[0].get('source_url') if media else None
+        })
+        if result:
+            logger.info("Published to Google Business Profile")
+        return {'gbp_result': result, 'gbp_post_id': result.get('name') if result else None}
+
+    def step_store_results(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        wordpress_key = context['client_config'].wordpress_api_key or ''
+        if wordpress_key.startswith('wp_demo_key'):  # every mock post has the same id
+            logger.debug("Mock WordPress publication, post not stored")
+            return {'stored': False}
+        stored = self.persist(context['client_id'], 'save_blog_post', context['generated_content'],
+                              context['upload'], context.get('wordpress_result') or {})
+        return {'stored': bool(stored)}
+
+    # ranking_monitoring steps
+
+    def step_fetch_rankings(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # An iterator: the export is only fetched as check_thresholds consumes it
+        rankings = self.stream_keyword_rankings(context['client_config'], inputs['domain'])
+        return {'keyword_rankings': rankings}
+
+    def step_analyze_rankings(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        client_id = context['client_id']
+        summary = {'keywords': 0, 'stored': 0}
+        rankings = self.store_rankings(client_id, inputs['keyword_rankings'] or [], summary)
+        history = self.ranking_history.record(client_id, date.today(), rankings, self.ranking_analysis_days())
+        analysis = self.analyze_rankings(client_id, history)
         return {
-            'success': True,
-            'content': content,
-            'wordpress': wordpress_result,
-            'gbp': gbp_result,
-            'timestamp': datetime.now().isoformat()
+            'ranking_changes': {
+                'drops': analysis['alerts'],
+                'volatile': analysis['volatile'],
+                'significant_drop': bool(analysis['triggers'])
+            },
+            'reoptimization_triggers': analysis['triggers'],
+            'ranking_summary': summary
         }
 
-    def run_monthly_report(self, client_id: str) -> Dict[str, Any]:
-        """Generate monthly SEO performance report"""
-        logger.info(f"Generating monthly report for client {client_id}")
+    def store_rankings(self, client_id: str, rankings: Iterable[KeywordRanking],
+                       summary: Dict[str, int]) -> Iterator[KeywordRanking]:
+        """Pass rankings through, upserting them database.batch_size rows at a time and counting them in summary"""
+        batch: List[Dict[str, Any]] = []
+        storing = self.results_store is not None
+        for ranking in rankings:
+            summary['keywords'] += 1
+            if storing:
+                batch.append(ranking.to_dict())
+                if len(batch) >= self.results_store.batch_size:
+                    stored = self.persist(client_id, 'save_rankings', batch)
+                    storing = stored is not None  # logged once; the rest would fail the same way
+                    summary['stored'] += stored or 0
+                    batch = []
+            yield ranking
+        if storing and batch:
+            summary['stored'] += self.persist(client_id, 'save_rankings', batch) or 0
+
+    def step_reoptimize_content(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # Content re-optimization runs in the TypeScript engine; surface what needs it
+        triggers = context.get('reoptimization_triggers') or []
+        logger.info(
+            f"{context['client_id']}: {len(triggers)} keywords need re-optimization: "
+            + ', '.join(t['keyword'] for t in triggers[:10])
+        )
+        return {'reoptimized_content': []}
 
-        client_config = self.get_client_config(client_id)
-        client_info = self.config['clients'][client_id]
+    # monthly_reporting steps
 
+    def step_multi_api_fetch(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        fetchers = {
+            'ga4': self.fetch_ga4_analytics,
+            'semrush': self.fetch_top_rankings
+        }
+        providers = {'ga4': 'google_analytics_4', 'semrush': 'semrush'}
+        apis = [
+            api for api in step.get('apis', [])
+            if api in fetchers and context['client_config'].has_credentials(providers[api])
+        ]
+        for api in step.get('apis', []):
+            if api not in apis:
+                logger.debug(f"No analytics fetcher or credentials for {api}, skipping")
+
+        def timed(api: str):
+            started = time.perf_counter()
+            return fetchers[api](context), time.perf_counter() - started
+
+        analytics_data, timings = {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, len(apis)), thread_name_prefix='multi_api_fetch') as executor:
+            futures = {api: executor.submit(contextvars.copy_context().run, timed, api) for api in apis}
+            for api, future in futures.items():
+                analytics_data[api], timings[api] = future.result()
+        logger.info("Fetched analytics: " + ', '.join(f"{api}={t:.3f}s" for api, t in timings.items()))
+        return {'analytics_data': analytics_data, 'api_timings': timings}
+
+    def fetch_ga4_analytics(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        client_config = context['client_config']
+        days = self.config.get('global', {}).get('ga4_days_history', 30)
+        ga4_data = self.get_ga4_metrics(client_config, days)
+        if not ga4_data:
+            return None
+        self.persist(context['client_id'], 'save_analytics', ga4_data)
+        if self.metrics_store is not None and client_config.ga4_property_id:
+            totals = self.metrics_store.totals(
+                client_config.ga4_property_id,
+                (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
+                datetime.now().strftime('%Y-%m-%d')
+            )
+            if totals:
+                return totals
+        return {
+            'total_sessions': sum(d['sessions'] for d in ga4_data),
+            'total_users': sum(d['users'] for d in ga4_data),
+            'total_page_views': sum(d['page_views'] for d in ga4_data),
+            'avg_bounce_rate': sum(d['bounce_rate'] for d in ga4_data) / len(ga4_data),
+            'total_conversions': sum(d['conversions'] for d in ga4_data)
+        }
+
+    def fetch_top_rankings(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.check_keyword_rankings(context['client_config'], context['client']['website'], limit=20)
+
+    def step_build_report(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        client_info = context['client']
+        analytics = inputs.get('analytics_data') or {}
         report = {
             'client_name': client_info['name'],
             'website': client_info['website'],
             'period': datetime.now().strftime('%Y-%m'),
             'generated_at': datetime.now().isoformat()
         }
+        if analytics.get('ga4'):
+            report['ga4_analytics'] = analytics['ga4']
+        if analytics.get('semrush'):
+            report['keyword_rankings'] = analytics['semrush']  # Top 20 keywords
+        return {'monthly_report': report}
+
+    def step_update_dashboard(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # Looker Studio refreshes from its own data sources
+        return {'dashboard_updated': False}
+
+    def step_send_notifications(self, step: Dict[str, Any], inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # Send report via email/API
+        return {'notification_sent': False}
+
+    def process_upload(self, client_id: str, upload_data: Dict[str, Any],
+                       completed_steps: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Process a new content upload through the content_creation workflow.
+
+        completed_steps records (and on a retry, replays) the outputs of the
+        publishing steps; see resumable().
+        """
+        logger.info(f"Processing upload for client {client_id}: {upload_data['title']}")
 
-        # GA4 Analytics
-        ga4_data = self.get_ga4_metrics(client_config)
-        if ga4_data:
-            report['ga4_analytics'] = {
-                'total_sessions': sum(d['sessions'] for d in ga4_data),
-                'total_users': sum(d['users'] for d in ga4_data),
-                'total_page_views': sum(d['page_views'] for d in ga4_data),
-                'avg_bounce_rate': sum(d['bounce_rate'] for d in ga4_data) / len(ga4_data),
-                'total_conversions': sum(d['conversions'] for d in ga4_data)
-            }
+        context = self.upload_context(client_id, upload_data)
+        if completed_steps is not None:
+            context['completed_steps'] = completed_steps
+        run = self.workflow_engine.run('content_creation', context)
+        return self.upload_result(run.context, run.timings)
+
+    def upload_context(self, client_id: str, upload_data: Dict[str, Any]) -> Dict[str, Any]:
+        """content_creation context for one upload"""
+        if client_id not in self.config.get('clients', {}):
+            raise ValueError(f"Unknown client: {client_id}")
+        return self.workflow_context(
+            client_id,
+            upload=upload_data,
+            upload_type=upload_data.get('type'),
+            media_files=media_files(upload_data),
+            description=upload_data.get('description'),
+            service=upload_data.get('service'),
+            location=upload_data.get('location')
+        )
 
-        # SEMrush Rankings
-        rankings = self.check_keyword_rankings(client_config, client_info['website'])
-        if rankings:
-            report['keyword_rankings'] = rankings[:20]  # Top 20 keywords
+    def upload_result(self, context: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+        """Shape a finished content_creation context into the process_upload result"""
+        content = context['generated_content']
+        if context.get('wordpress_url'):
+            content['wordpress_url'] = context['wordpress_url']
 
-        logger.info("Monthly report generated successfully")
-        return report
+        return {
+            'success': True,
+            'content': content,
+            'wordpress': context.get('wordpress_result') or {},
+            'gbp': context.get('gbp_result') or {},
+            'media': {
+                'prepared': context.get('prepared_media') or [],
+                'wordpress': context.get('wordpress_media') or [],
+                'gbp': context.get('gbp_media') or []
+            },
+            'timings': timings,
+            'timestamp': datetime.now().isoformat()
+        }
 
-    def schedule_automations(self):
-        """Schedule recurring automation tasks"""
-        # Daily ranking checks
-        schedule.every().day.at("09:00").do(self.daily_ranking_check)
+    def process_upload_batch(self, source: str, output: TextIO,
+                             default_client: Optional[str] = None) -> Dict[str, Any]:
+        """Stream uploads from a JSONL file, directory or stdin through pipelined stages.
+
+        Each record is an upload object with an optional `client_id` (falls
+        back to default_client). Results are written to `output` as JSONL in
+        completion order.
+        """
+        settings = self.config.get('batch', {}) or {}
+
+        def make_context(record: Dict[str, Any]) -> Dict[str, Any]:
+            upload = dict(record)
+            client_id = upload.pop('client_id', None) or upload.pop('client', None) or default_client
+            if not client_id:
+                raise ValueError("record has no client_id and no --client was given")
+            return self.upload_context(client_id, upload)
+
+        def write(result: Dict[str, Any]):
+            output.write(json.dumps(result, default=str) + '\n')
+            output.flush()
+
+        pipeline = BatchPipeline(
+            self.workflow_engine, 'content_creation', make_context, self.upload_result,
+            stage_workers=settings.get('stage_workers', 4),
+            queue_size=settings.get('queue_size', 100),
+            max_deferrals=self.retry_policy.max_retries
+        )
+        records = iter_upload_records(source)
+        batch_generation = self.config.get('apis', {}).get('openai', {}).get('batch', {}) or {}
+        if batch_generation.get('enabled'):
+            records = self.pregenerate_batches(records, default_client, batch_generation.get('size', 500),
+                                               batch_generation.get('max_wait_seconds', 3600))
+
+        stats = pipeline.run(records, write)
+        if self.generation_cache is not None:
+            stats['generation_cache'] = self.generation_cache.stats()
+            logger.info(f"Generation cache: {stats['generation_cache']}")
+        return stats
+
+    def run_monthly_report(self, client_id: str) -> Dict[str, Any]:
+        """Generate monthly SEO performance report"""
+        logger.info(f"Generating monthly report for client {client_id}")
 
-        # Monthly reports
-        schedule.every().month.at("01:00").do(self.monthly_reporting)
+        today = datetime.now()
+        run = self.run_workflow(
+            'monthly_reporting', client_id,
+            date_range={'start': today.replace(day=1).strftime('%Y-%m-%d'), 'end': today.strftime('%Y-%m-%d')}
+        )
 
-        # Re-optimization checks
-        schedule.every().week.do(self.check_reoptimization_triggers)
+        logger.info("Monthly report generated successfully")
+        return run.context['monthly_report']
+
+    def scheduled_jobs(self) -> List[ScheduledJob]:
+        """Recurring jobs with cron deadlines from global.ranking_check_hour / monthly_report_day.
+
+        scheduler.jobs.<name>.cron overrides a default expression;
+        scheduler.jitter_seconds spreads each job's clients over that window.
+        With job_queue.enabled the jobs only queue per-client work for
+        --worker processes instead of running it here.
+        """
+        settings = self.config.get('global', {})
+        scheduler = self.config.get('scheduler', {}) or {}
+        overrides = scheduler.get('jobs', {}) or {}
+        jitter = scheduler.get('jitter_seconds', 0)
+        hour = settings.get('ranking_check_hour', 9)
+        queued = (self.config.get('job_queue', {}) or {}).get('enabled', False)
+
+        def submit(kind: str, providers: Sequence[str] = (), spread_clients: bool = True):
+            return lambda due: self.submit_for_all_clients(
+                kind, due.isoformat(timespec='minutes'), providers, jitter if spread_clients else 0.0
+            )
+
+        defaults = {
+            # Daily ranking checks
+            'daily_ranking_check': (
+                f"0 {hour} * * *",
+                submit('ranking_check', ['semrush']) if queued
+                else lambda due: self.daily_ranking_check(jitter=jitter)
+            ),
+            # Monthly reports
+            'monthly_reporting': (
+                f"0 1 {settings.get('monthly_report_day', 1)} * *",
+                submit('monthly_report', ['google_analytics_4', 'semrush']) if queued
+                else lambda due: self.monthly_reporting(jitter=jitter)
+            ),
+            # Re-optimization checks, after Monday's ranking check has had time to finish
+            'check_reoptimization_triggers': (
+                f"0 {(hour + 2) % 24} * * 1",
+                submit('reoptimization_check', spread_clients=False) if queued
+                else lambda due: self.check_reoptimization_triggers()
+            )
+        }
+        return [
+            ScheduledJob(name, (overrides.get(name) or {}).get('cron', cron), func)
+            for name, (cron, func) in defaults.items()
+            if (overrides.get(name) or {}).get('enabled', True)
+        ]
 
+    def schedule_automations(self):
+        """Schedule recurring automation tasks and run them until interrupted"""
+        self.credentials_report()
+        settings = self.config.get('scheduler', {}) or {}
+        scheduler = Scheduler(
+            self.scheduled_jobs(),
+            state_path=settings.get('state_path', '.cache/scheduler_state.json'),
+            max_workers=settings.get('workers', 3),
+            catch_up=settings.get('catch_up', True)
+        )
         logger.info("Automation schedules configured")
+        scheduler.run_forever()
+
+    def run_for_all_clients(self, job_name: str, job, providers: Sequence[str] = (),
+                            jitter: float = 0.0) -> Dict[str, Any]:
+        """Run a per-client job for every configured client with bounded concurrency.
+
+        Each client runs in its own worker so a slow or failing API call only
+        affects that client. Jobs that raise RetryLater are re-queued after
+        their backoff while the other clients keep running; a re-run resumes
+        the retry budget the deferred request had spent. With `providers`, clients that have credentials
+        for none of them are skipped up front. With `jitter`, each client starts
+        at a stable offset within that many seconds instead of all at once.
+        Returns per-client results, errors and latencies.
+        """
+        client_ids = list(self.config.get('clients', {}))
+        skipped: List[str] = []
+        if providers:
+            selection = self.clients_with_credentials(providers)
+            client_ids, skipped = selection['configured'], selection['skipped']
+            if skipped:
+                logger.info(
+                    f"{job_name}: skipping {len(skipped)} clients without {'/'.join(providers)} "
+                    f"credentials: {', '.join(skipped[:10])}"
+                )
+        results: Dict[str, Dict[str, Any]] = {}
+        attempts: Dict[str, int] = {client_id: 0 for client_id in client_ids}
+        spent: Dict[str, int] = {client_id: 0 for client_id in client_ids}
 
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        def run_client(client_id: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                with RetryBudget(spent[client_id]).active():
+                    return {'success': True, 'result': job(client_id),
+                            'latency': time.perf_counter() - started}
+            except RetryLater as e:
+                spent[client_id] = max(spent[client_id], e.attempt)
+                return {'success': False, 'error': str(e), 'retry_in': e.delay,
+                        'latency': time.perf_counter() - started}
+            except Exception as e:
+                logger.error(f"Error in {job_name} for {client_id}: {e}")
+                return {'success': False, 'error': str(e),
+                        'latency': time.perf_counter() - started}
+
+        started = time.perf_counter()
+        workers = max(1, min(self.max_workers, len(client_ids) or 1))
+        deferred: List[Any] = []  # heap of (ready_at, client_id)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=job_name) as executor:
+            futures = {}
+            start = time.monotonic()
+            for client_id in client_ids:
+                offset = spread(f"{job_name}:{client_id}", jitter)
+                if offset:
+                    heapq.heappush(deferred, (start + offset, client_id))
+                else:
+                    futures[executor.submit(run_client, client_id)] = client_id
+            while futures or deferred:
+                now = time.monotonic()
+                while deferred and deferred[0][0] <= now:
+                    _, client_id = heapq.heappop(deferred)
+                    futures[executor.submit(run_client, client_id)] = client_id
+
+                timeout = max(0.0, deferred[0][0] - now) if deferred else None
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    client_id = futures.pop(future)
+                    outcome = future.result()
+                    attempts[client_id] += 1
+                    if 'retry_in' in outcome and attempts[client_id] <= self.retry_policy.max_retries:
+                        logger.warning(
+                            f"{job_name} for {client_id} deferred {outcome['retry_in']:.1f}s: {outcome['error']}"
+                        )
+                        heapq.heappush(deferred, (time.monotonic() + outcome.pop('retry_in'), client_id))
+                        continue
+                    outcome.pop('retry_in', None)
+                    outcome['attempts'] = attempts[client_id]
+                    results[client_id] = outcome
+                    logger.debug(f"{job_name} {client_id} finished in {outcome['latency']:.3f}s")
+        wall_time = time.perf_counter() - started
+
+        latencies = [r['latency'] for r in results.values()]
+        failed = sum(1 for r in results.values() if not r['success'])
+        logger.info(
+            f"{job_name} finished {len(client_ids)} clients in {wall_time:.2f}s "
+            f"with {workers} workers ({failed} failed); per-client latency "
+            f"min={min(latencies, default=0):.3f}s avg={sum(latencies) / max(len(latencies), 1):.3f}s "
+            f"max={max(latencies, default=0):.3f}s"
+        )
 
-    def daily_ranking_check(self):
+        return {
+            'job': job_name,
+            'workers': workers,
+            'wall_time': wall_time,
+            'failed': failed,
+            'rate_limits': self.rate_limiter.stats(),
+            'transport': self.transport.stats(),
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'stored': self.results_store.stats() if self.results_store is not None else None,
+            'skipped': skipped,
+            'clients': results
+        }
+
+    def daily_ranking_check(self, jitter: float = 0.0) -> Dict[str, Any]:
         """Daily keyword ranking monitoring"""
         logger.info("Running daily ranking check")
-        for client_id in self.config['clients']:
-            try:
-                rankings = self.check_keyword_rankings(
-                    self.get_client_config(client_id),
-                    self.config['clients'][client_id]['website']
-                )
-                # Store rankings in database/API
-                logger.info(f"Updated rankings for {client_id}: {len(rankings)} keywords")
-            except Exception as e:
-                logger.error(f"Error checking rankings for {client_id}: {e}")
 
-    def monthly_reporting(self):
+        return self.run_for_all_clients('daily_ranking_check', self.check_client_rankings,
+                                        providers=['semrush'], jitter=jitter)
+
+    def check_client_rankings(self, client_id: str) -> Dict[str, Any]:
+        """Run the ranking_monitoring workflow for one client.
+
+        Rankings are streamed into the history and database rather than
+        returned; the result is a count of keywords checked and stored.
+        """
+        run = self.run_workflow(
+            'ranking_monitoring', client_id,
+            domain=self.config['clients'][client_id]['website']
+        )
+        summary = dict(run.context['ranking_summary'],
+                       significant_drop=run.context['ranking_changes']['significant_drop'])
+        logger.info(f"Updated rankings for {client_id}: {summary['keywords']} keywords")
+        return summary
+
+    def monthly_reporting(self, jitter: float = 0.0) -> Dict[str, Any]:
         """Generate monthly performance reports"""
         logger.info("Running monthly reporting")
-        for client_id in self.config['clients']:
-            try:
-                report = self.run_monthly_report(client_id)
-                # Send report via email/API
-                logger.info(f"Generated monthly report for {client_id}")
-            except Exception as e:
-                logger.error(f"Error generating report for {client_id}: {e}")
 
-    def check_reoptimization_triggers(self):
+        def report_client(client_id: str) -> Dict[str, Any]:
+            report = self.run_monthly_report(client_id)
+            self.persist(client_id, 'save_report_summary', report)
+            logger.info(f"Generated monthly report for {client_id}")
+            return report
+
+        return self.run_for_all_clients('monthly_reporting', report_client,
+                                        providers=['google_analytics_4', 'semrush'], jitter=jitter)
+
+    def analyze_rankings(self, client_id: str, history: Optional[RankingHistory] = None) -> Dict[str, Any]:
+        """Find ranking drops, alerts and volatile keywords in a client's history"""
+        if history is None:
+            history = self.ranking_history.load(client_id, self.ranking_analysis_days())
+        threshold = self.config.get('global', {}).get('reoptimization_threshold', 5)
+        alerts = self.config.get('monitoring', {}).get('alerts', {})
+        alert_threshold = alerts.get('ranking_drop_threshold', threshold)
+        analysis = self.config.get('ranking_history', {})
+
+        drops = history.drops(min(threshold, alert_threshold), analysis.get('baseline_days', 7))
+
+        alerted = [d for d in drops if d['change'] is None or d['change'] >= alert_threshold]
+        for drop in alerted:
+            logger.warning(
+                f"Ranking drop for {client_id}: '{drop['keyword']}' "
+                f"{drop['baseline_position']} -> {drop['current_position'] or 'not ranked'}"
+            )
+
+        automation = self.config['clients'][client_id].get('automation', {})
+        triggers = []
+        if automation.get('auto_reoptimize'):
+            triggers = [d for d in drops if d['change'] is None or d['change'] >= threshold]
+
+        volatile = history.volatile(analysis.get('volatility_window', 14),
+                                    analysis.get('volatility_threshold', 3))
+        logger.info(
+            f"{client_id}: {len(triggers)} re-optimization triggers, {len(alerted)} alerts, "
+            f"{len(volatile)} volatile keywords over {history.days} days"
+        )
+        return {'triggers': triggers, 'alerts': alerted, 'volatile': volatile}
+
+    def ranking_analysis_days(self) -> int:
+        """Days of history analyze_rankings looks at: the drop baseline plus today, or the volatility window"""
+        analysis = self.config.get('ranking_history', {})
+        return max(analysis.get('baseline_days', 7) + 1, analysis.get('volatility_window', 14))
+
+    def check_reoptimization_triggers(self) -> Dict[str, Any]:
         """Check for content that needs re-optimization"""
         logger.info("Checking re-optimization triggers")
-        # Implementation would check ranking drops and trigger re-optimization
-        pass
+        return self.run_for_all_clients('check_reoptimization_triggers', self.analyze_rankings)
+
+def run_worker(config_file: str, index: int = 0, exit_when_idle: bool = False,
+               metrics_port: Optional[int] = None, metrics_json: Optional[str] = None, **options) -> Dict[str, int]:
+    """One job queue worker: build the workflow and process jobs until SIGTERM/SIGINT"""
+    workflow = SEOAutomationWorkflow(config_file, **options)
+    settings = workflow.config.get('job_queue', {}) or {}
+    port = (workflow.config.get('monitoring', {}) or {}).get('metrics_port', 0) if metrics_port is None else metrics_port
+    workflow.start_metrics_server(port + index if port else 0)
+    stop = threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    worker = JobWorker(
+        workflow.job_queue, workflow.job_handlers(),
+        poll_interval=settings.get('poll_interval_seconds', 1.0),
+        retry_delay=workflow.retry_policy.backoff
+    )
+    try:
+        return worker.run(stop, exit_when_idle=exit_when_idle)
+    except KeyboardInterrupt:
+        return {'processed': worker.processed, 'failed': worker.failed}
+    finally:
+        workflow.media.close()
+        path = metrics_json or (workflow.config.get('monitoring', {}) or {}).get('metrics_json')
+        if path and index:
+            root, ext = os.path.splitext(path)
+            path = f"{root}.worker{index}{ext}"
+        workflow.dump_metrics(path)
+
+def run_workers(count: int, config_file: str, exit_when_idle: bool = False, **options):
+    """Run `count` worker processes against the configured job queue"""
+    if count <= 1:
+        run_worker(config_file, 0, exit_when_idle, **options)
+        return
+    processes = [
+        multiprocessing.Process(target=run_worker, name=f"seo-worker-{index}",
+                                args=(config_file, index, exit_when_idle), kwargs=options)
+        for index in range(count)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {count} queue workers")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
 
 def main():
     """Main entry point"""
@@ -514,14 +1669,69 @@ def main():
     parser.add_argument('--config', default='config/workflow.yaml', help='Configuration file path')
     parser.add_argument('--client', help='Client ID for single client operations')
     parser.add_argument('--upload', help='JSON file with upload data')
+    parser.add_argument('--batch', help="JSONL file, directory of upload files, or '-' for stdin")
+    parser.add_argument('--output', help='Write --batch results (or queued job ids with --enqueue) as JSONL '
+                                         'to this file (default: stdout)')
     parser.add_argument('--schedule', action='store_true', help='Run scheduled automations')
+    parser.add_argument('--workers', type=int, help='Concurrent client jobs (overrides global.max_workers)')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the API response cache entirely')
+    parser.add_argument('--refresh', action='store_true', help='Ignore cached API responses and refetch')
+    parser.add_argument('--no-config-snapshot', action='store_true',
+                        help='Parse the config file on every run instead of reading the .cache/config snapshot')
+    parser.add_argument('--env-file', default='.env', help='Read ${VAR} values from this .env file if it exists')
+    parser.add_argument('--worker', type=int, metavar='N', help='Run N job queue worker processes')
+    parser.add_argument('--drain', action='store_true', help='With --worker, exit once the queue is empty')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='Queue --upload/--batch uploads or the --client report for workers instead of running them')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve Prometheus metrics on this port (default monitoring.metrics_port for '
+                             '--schedule/--worker; 0 disables)')
+    parser.add_argument('--metrics-json', help='Write a JSON metrics snapshot here on exit (default monitoring.metrics_json)')
 
     args = parser.parse_args()
 
-    workflow = SEOAutomationWorkflow(args.config)
-
+    if args.worker:
+        run_workers(args.worker, args.config, exit_when_idle=args.drain, max_workers=args.workers,
+                    use_cache=not args.no_cache, refresh=args.refresh, env_file=args.env_file,
+                    config_snapshot=not args.no_config_snapshot, metrics_port=args.metrics_port, metrics_json=args.metrics_json)
+        return
+
+    workflow = SEOAutomationWorkflow(args.config, max_workers=args.workers,
+                                     use_cache=not args.no_cache, refresh=args.refresh,
+                                     env_file=args.env_file, config_snapshot=not args.no_config_snapshot)
+    if args.schedule or args.metrics_port:
+        workflow.start_metrics_server(args.metrics_port)
+    try:
+        run_command(workflow, args, parser)
+    finally:
+        workflow.media.close()
+        workflow.dump_metrics(args.metrics_json)
+
+def run_command(workflow: SEOAutomationWorkflow, args, parser):
+    """Dispatch the single-process CLI modes"""
     if args.schedule:
         workflow.schedule_automations()
+    elif args.enqueue and args.batch:
+        if args.output:
+            with open(args.output, 'w') as output:
+                workflow.submit_upload_batch(args.batch, output, default_client=args.client)
+        else:
+            workflow.submit_upload_batch(args.batch, sys.stdout, default_client=args.client)
+    elif args.enqueue and args.upload and args.client:
+        with open(args.upload, 'r') as f:
+            print(json.dumps(workflow.submit_upload(args.client, json.load(f))))
+    elif args.enqueue and args.client:
+        job_id, created = workflow.job_queue.enqueue(
+            'monthly_report', {'client_id': args.client},
+            idempotency_key=f"monthly_report:{args.client}:{datetime.now().strftime('%Y-%m')}"
+        )
+        print(json.dumps({'job_id': job_id, 'created': created}))
+    elif args.batch:
+        if args.output:
+            with open(args.output, 'w') as output:
+                workflow.process_upload_batch(args.batch, output, default_client=args.client)
+        else:
+            workflow.process_upload_batch(args.batch, sys.stdout, default_client=args.client)
     elif args.upload and args.client:
         with open(args.upload, 'r') as f:
             upload_data = json.load(f)
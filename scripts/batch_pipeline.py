@@ -0,0 +1,258 @@
+"""
+Batch upload processing: stream upload records through the content_creation
+steps as pipelined stages connected by bounded queues
+"""
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Any, Iterator, Optional, TextIO, Tuple
+
+from retry import RetryBudget
+from workflow_engine import WorkflowEngine, evaluate_condition
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class InvalidRecord(dict):
+    """Stands in for input that could not be parsed; the pipeline reports it as a failed record"""
+
+    def __init__(self, error: str):
+        super().__init__()
+        self.error = error
+
+
+def iter_upload_records(source: str) -> Iterator[Dict[str, Any]]:
+    """Yield upload records from a JSONL file, a directory of .json/.jsonl files, or '-' for stdin.
+
+    Lines or files that are not valid JSON are yielded as InvalidRecord.
+    """
+    if source == '-':
+        yield from _iter_jsonl(sys.stdin)
+        return
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if name.endswith(('.json', '.jsonl')) and os.path.isfile(path):
+                yield from iter_upload_records(path)
+        return
+    with open(source, 'r') as f:
+        if source.endswith('.json'):
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                yield InvalidRecord(f"{source}: {e}")
+                return
+            yield from (data if isinstance(data, list) else [data])
+        else:
+            yield from _iter_jsonl(f, source)
+
+
+def _iter_jsonl(stream: TextIO, source: str = '<stdin>') -> Iterator[Dict[str, Any]]:
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:  # one bad line must not abort the rest of the batch
+            yield InvalidRecord(f"{source} line {number}: {e}")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+
+class BatchPipeline:
+    """Runs each step of a workflow as its own stage of worker threads.
+
+    Items move stage to stage through bounded queues, so generation for
+    upload N+1 overlaps with publishing upload N. A failing item is marked
+    and passed straight to the sink; the rest of the batch continues. An item
+    whose step raises RetryLater (anything with a `.delay`) is parked in the
+    stage's deferred heap and re-run once the delay has passed, up to
+    max_deferrals times, resuming the retry budget it had spent. Stage
+    workers keep taking new items meanwhile; a stage closes once its input
+    is exhausted and nothing is left deferred.
+    """
+
+    def __init__(self, engine: WorkflowEngine, workflow: str,
+                 make_context: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 finalize: Callable[[Dict[str, Any], Dict[str, float]], Dict[str, Any]],
+                 stage_workers: int = 4, queue_size: int = 100, max_deferrals: int = 3):
+        self.engine = engine
+        self.workflow = workflow
+        self.stages = engine.stages(workflow)
+        self.make_context = make_context
+        self.finalize = finalize
+        self.stage_workers = max(1, stage_workers)
+        self.queue_size = max(1, queue_size)
+        self.max_deferrals = max(0, max_deferrals)
+        self.latencies: Dict[str, List[float]] = {step.name: [] for step in self.stages}
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()  # tie-breaker for deferred items due at the same time
+
+    def run(self, records: Iterator[Dict[str, Any]], sink: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Process all records, calling sink(result) as each one completes; returns run stats"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        counts = {'processed': 0, 'failed': 0}
+        threads = []
+
+        for index, step in enumerate(self.stages):
+            remaining = [self.stage_workers]
+            deferred: List[Tuple[float, int, Dict[str, Any]]] = []
+            downstream = self.stage_workers if index + 1 < len(self.stages) else 1
+            for n in range(self.stage_workers):
+                thread = threading.Thread(
+                    target=self._stage_worker, name=f"{step.name}-{n}",
+                    args=(step, queues[index], queues[index + 1], remaining, downstream, deferred), daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        def drain():
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    return
+                counts['failed' if item.get('error') else 'processed'] += 1
+                sink(self._result(item))
+
+        writer = threading.Thread(target=drain, name='batch-sink', daemon=True)
+        writer.start()
+
+        started = time.perf_counter()
+        for index, record in enumerate(records):
+            item = {'index': index, 'record': record, 'timings': {}, 'started': time.perf_counter()}
+            if isinstance(record, InvalidRecord):
+                item['error'] = f"Invalid record: {record.error}"
+                logger.error(f"Batch record {index} skipped: {record.error}")
+                queues[0].put(item)
+                continue
+            try:
+                item['context'] = self.make_context(record)
+            except Exception as e:
+                item['error'] = f"Invalid record: {e}"
+            queues[0].put(item)
+        for _ in range(self.stage_workers):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        writer.join()
+        wall_time = time.perf_counter() - started
+
+        total = counts['processed'] + counts['failed']
+        stats = {
+            'records': total,
+            'processed': counts['processed'],
+            'failed': counts['failed'],
+            'wall_time': wall_time,
+            'throughput_per_second': total / wall_time if wall_time else 0.0,
+            'stages': {
+                name: {
+                    'count': len(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95)
+                }
+                for name, values in self.latencies.items()
+            }
+        }
+        logger.info(
+            f"Batch {self.workflow}: {total} records ({counts['failed']} failed) in {wall_time:.2f}s, "
+            f"{stats['throughput_per_second']:.1f} records/s; "
+            + '; '.join(f"{name} p50={s['p50'] * 1000:.1f}ms p95={s['p95'] * 1000:.1f}ms"
+                        for name, s in stats['stages'].items())
+        )
+        return stats
+
+    def _stage_worker(self, step, inbox: queue.Queue, outbox: queue.Queue, remaining: List[int], downstream: int,
+                      deferred: List[Tuple[float, int, Dict[str, Any]]]):
+        closed = False
+        while True:
+            item = self._next_item(inbox, deferred, closed)
+            if item is _DONE:
+                closed = True
+                continue
+            if item is None:
+                with self.lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:  # the last worker of this stage closes the next one
+                    for _ in range(downstream):
+                        outbox.put(_DONE)
+                return
+
+            if not item.get('error'):
+                context = item['context']
+                if evaluate_condition(step.condition, context):
+                    try:
+                        with RetryBudget(item.get('retries_spent', 0)).active():
+                            outputs, elapsed = self.engine.run_step(step, context)
+                        context.update(outputs or {})
+                        item['timings'][step.name] = elapsed
+                        with self.lock:
+                            self.latencies[step.name].append(elapsed)
+                    except Exception as e:
+                        if self._defer(step, item, e, deferred):
+                            continue
+                        item['error'] = f"{step.name}: {e}"
+                        logger.error(f"Batch record {item['index']} failed at {step.name}: {e}")
+                else:
+                    item['timings'][step.name] = 0.0
+            item.pop('deferrals', None)
+            item.pop('retries_spent', None)
+            outbox.put(item)
+
+    def _next_item(self, inbox: queue.Queue, deferred: List[Tuple[float, int, Dict[str, Any]]],
+                   closed: bool) -> Optional[Any]:
+        """A due deferred item, else the next inbox item; None once the inbox is closed and nothing is deferred"""
+        while True:
+            with self.lock:
+                wait_for = deferred[0][0] - time.monotonic() if deferred else None
+                if wait_for is not None and wait_for <= 0:
+                    return heapq.heappop(deferred)[2]
+                if closed and wait_for is None:
+                    return None
+            if closed:  # no more input; only deferred items are left
+                time.sleep(min(wait_for, 1.0))
+                continue
+            try:
+                return inbox.get(timeout=wait_for)
+            except queue.Empty:
+                continue
+
+    def _defer(self, step, item: Dict[str, Any], error: Exception,
+               deferred: List[Tuple[float, int, Dict[str, Any]]]) -> bool:
+        """Park an item whose step raised RetryLater; False if it cannot be deferred again"""
+        delay = getattr(error, 'delay', None)
+        if delay is None or item.get('deferrals', 0) >= self.max_deferrals:
+            return False
+        item['deferrals'] = item.get('deferrals', 0) + 1
+        item['retries_spent'] = max(item.get('retries_spent', 0), getattr(error, 'attempt', 0))
+        logger.warning(f"Batch record {item['index']} deferred {delay:.1f}s at {step.name}: {error}")
+        with self.lock:
+            heapq.heappush(deferred, (time.monotonic() + delay, next(self.sequence), item))
+        return True
+
+    def _result(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if item.get('error'):
+            return {'index': item['index'], 'success': False, 'error': item['error'],
+                    'client_id': (item.get('context') or {}).get('client_id')}
+        result = self.finalize(item['context'], item['timings'])
+        result['index'] = item['index']
+        result['client_id'] = item['context'].get('client_id')
+        result['latency'] = time.perf_counter() - item['started']
+        return result
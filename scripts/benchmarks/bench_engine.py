@@ -0,0 +1,365 @@
+"""
+Benchmark the workflow engine end to end against local fake APIs
+Generates N synthetic clients whose API keys and base URLs point at the
+servers in fake_apis.py (run in a child process so they do not share the
+engine's GIL or RSS), then drives process_upload, process_upload_batch with
+OpenAI batch jobs, daily_ranking_check and monthly_reporting
+(run_monthly_report per client). Reports throughput, p50/p95/p99 latency
+and peak RSS per scenario, optionally writing JSON and comparing against a
+previous run made with the same settings. Peak RSS is the process high-water
+mark after each scenario, so run one scenario per invocation to isolate it.
+
+Usage: python scripts/benchmarks/bench_engine.py [--clients 1000] [--latency-ms 20]
+           [--error-rate 0.01] [--semrush-rows 5000] [--media-kb 800] [--output bench.json]
+           [--baseline previous.json --max-regression 0.2]
+"""
+import argparse
+import importlib.util
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Any, List
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_pipeline import percentile  # noqa: E402
+from config_loader import parse_yaml  # noqa: E402
+from fake_apis import BASE_PATHS, FakeAPIServers, FakeSettings  # noqa: E402
+
+import yaml  # noqa: E402
+
+CONFIG_FILE = os.path.join(SCRIPTS_DIR, '..', 'config', 'workflow.yaml')
+SCENARIOS = ('uploads', 'upload_batch', 'daily_ranking_check', 'monthly_reporting')
+
+SERVICES = ['Kitchen Renovation', 'Bathroom Remodel', 'Deck Construction', 'Water Heater Repair']
+LOCATIONS = ['Springfield, IL', 'Chicago, IL', 'Peoria, IL', 'Naperville, IL']
+INDUSTRIES = ['construction', 'plumbing']
+
+
+def load_engine():
+    """Import scripts/automation-workflow.py (not importable by name because of the hyphen)"""
+    spec = importlib.util.spec_from_file_location('automation_workflow', os.path.join(SCRIPTS_DIR, 'automation-workflow.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def serve_fakes(settings: FakeSettings, conn):
+    """Child process: run the fake servers, report their URLs, then stats when told to stop"""
+    with FakeAPIServers(settings) as servers:
+        conn.send(({provider: servers.url(provider) for provider in BASE_PATHS}, servers.gbp_upload_url()))
+        conn.recv()
+        conn.send(servers.stats())
+
+
+def synthetic_clients(count: int, urls: Dict[str, str]) -> Dict[str, Any]:
+    wordpress_root = urls['wordpress']
+    clients = {}
+    for n in range(count):
+        client_id = f"bench_{n:05d}"
+        clients[client_id] = {
+            'name': f"Bench Client {n}",
+            'website': f"https://client{n}.example.com",
+            'industry': INDUSTRIES[n % len(INDUSTRIES)],
+            'location': LOCATIONS[n % len(LOCATIONS)],
+            'wordpress_url': wordpress_root,
+            'wordpress_api_key': f"wp_bench_{n}",
+            'gbp_business_id': f"{n:020d}",
+            'gbp_access_token': f"gbp_bench_{n}",
+            'semrush_api_key': f"semrush_bench_{n}",
+            'ga4_property_id': str(100000000 + n),
+            'ga4_access_token': f"ga4_bench_{n}",
+            'openai_api_key': 'sk-bench',
+            'looker_studio_report_id': f"looker_bench_{n}",
+            'automation': {
+                'content_types': ['photo', 'testimonial', 'project_notes'],
+                'auto_publish_wordpress': True,
+                'auto_publish_gbp': True,
+                'auto_reoptimize': True,
+                'monthly_reports': True
+            }
+        }
+    return clients
+
+
+def write_config(workdir: str, clients: int, urls: Dict[str, str], gbp_upload_url: str, workers: int) -> str:
+    """workflow.yaml with synthetic clients, fake API URLs, no throttling and all state in workdir"""
+    config = parse_yaml(CONFIG_FILE)
+    config['clients'] = synthetic_clients(clients, urls)
+    config['global']['max_workers'] = workers
+    config['global']['content_templates'] = os.path.abspath(
+        os.path.join(os.path.dirname(CONFIG_FILE), config['global'].get('content_templates', 'content_templates.yaml'))
+    )
+    unlimited = {'requests_per_minute': 1e9, 'burst_limit': 1_000_000}
+    config['security']['rate_limiting'] = dict(unlimited)
+    for provider, url in urls.items():
+        api = config['apis'].setdefault(provider, {})
+        api['rate_limit'] = dict(unlimited)
+        if provider != 'wordpress':
+            api['base_url'] = url
+    config['apis']['openai']['live_generation'] = True
+    config['apis']['google_business_profile']['upload_url'] = gbp_upload_url
+    config['apis']['openai']['batch'].update({'poll_interval_seconds': 0.05, 'max_poll_interval_seconds': 0.5})
+    config['transport']['pool_maxsize'] = workers
+    config['error_handling']['retry_base_delay_seconds'] = 0.05
+    config['cache']['path'] = os.path.join(workdir, 'api_responses.sqlite3')
+    config['generation_cache']['path'] = os.path.join(workdir, 'generations.sqlite3')
+    config['generation_cache']['memory_entries'] = max(1000, clients)
+    config['metrics_store']['path'] = os.path.join(workdir, 'ga4_metrics.sqlite3')
+    config['ranking_history']['path'] = os.path.join(workdir, 'rankings')
+    config['media']['work_dir'] = os.path.join(workdir, 'media')
+    config['monitoring']['metrics_client_labels'] = False
+
+    path = os.path.join(workdir, 'workflow.yaml')
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+    return path
+
+
+def upload_for(n: int, photos: List[str] = ()) -> Dict[str, Any]:
+    upload = {
+        'type': 'photo',
+        'title': f"Project {n}",
+        'description': f"Completed project number {n} for a returning customer.",
+        'service': SERVICES[n % len(SERVICES)],
+        'location': LOCATIONS[n % len(LOCATIONS)]
+    }
+    if photos:
+        upload['file_path'] = photos[n % len(photos)]
+    return upload
+
+
+def write_photos(workdir: str, count: int, kb: int) -> List[str]:
+    """Synthetic photos of roughly kb each (noise JPEGs with Pillow, random bytes without)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+    directory = os.path.join(workdir, 'photos')
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for n in range(count):
+        path = os.path.join(directory, f"photo-{n}.jpg")
+        if Image is None:
+            with open(path, 'wb') as f:
+                f.write(os.urandom(kb * 1024))
+        else:
+            side = max(16, int((kb * 1024 / 1.5) ** 0.5))  # noise compresses to roughly 1.5 bytes/pixel
+            channels = [Image.effect_noise((side, side), 64 + 8 * c) for c in range(3)]
+            Image.merge('RGB', channels).save(path, 'JPEG', quality=90)
+        paths.append(path)
+    return paths
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(name: str, items: int, wall_time: float, latencies: List[float], failed: int) -> Dict[str, Any]:
+    result = {
+        'scenario': name,
+        'items': items,
+        'failed': failed,
+        'wall_time': round(wall_time, 3),
+        'throughput': round(items / wall_time, 2) if wall_time else 0.0,
+        'p50': round(percentile(latencies, 50), 4),
+        'p95': round(percentile(latencies, 95), 4),
+        'p99': round(percentile(latencies, 99), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+    print(f"{name:<20} {items:>6} items in {wall_time:7.2f}s  {result['throughput']:>9.1f}/s  "
+          f"p50={result['p50'] * 1000:7.1f}ms p95={result['p95'] * 1000:7.1f}ms p99={result['p99'] * 1000:7.1f}ms  "
+          f"failed={failed}  peak RSS {result['peak_rss_mb']:.0f}MB")
+    return result
+
+
+def bench_uploads(workflow, client_ids: List[str], workers: int, photos: List[str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    failed = 0
+
+    def run(n: int) -> float:
+        started = time.perf_counter()
+        workflow.process_upload(client_ids[n], upload_for(n, photos))
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bench-upload') as executor:
+        for future in [executor.submit(run, n) for n in range(len(client_ids))]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                failed += 1
+                logging.getLogger(__name__).debug(f"Upload failed: {e}")
+    return summarize('uploads', len(client_ids), time.perf_counter() - started, latencies, failed)
+
+
+def bench_upload_batch(workflow, client_ids: List[str], workdir: str, photos: List[str]) -> Dict[str, Any]:
+    source = os.path.join(workdir, 'uploads.jsonl')
+    with open(source, 'w') as f:
+        for n, client_id in enumerate(client_ids):
+            f.write(json.dumps(dict(upload_for(n, photos), client_id=client_id)) + '\n')
+
+    workflow.config['apis']['openai']['batch']['enabled'] = True
+    output = io.StringIO()
+    started = time.perf_counter()
+    stats = workflow.process_upload_batch(source, output)
+    wall_time = time.perf_counter() - started
+    latencies = [r['latency'] for r in map(json.loads, output.getvalue().splitlines()) if 'latency' in r]
+    return summarize('upload_batch', len(client_ids), wall_time, latencies, stats.get('failed', 0))
+
+
+def bench_all_clients(name: str, run: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result = run()
+    wall_time = time.perf_counter() - started
+    latencies = [r['latency'] for r in result['clients'].values()]
+    return summarize(name, len(result['clients']), wall_time, latencies, result['failed'])
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Lines describing scenarios that got slower (throughput or p95) or bigger than allowed"""
+    regressions = []
+    previous = {s['scenario']: s for s in baseline.get('scenarios', [])}
+    print(f"\nCompared with baseline from {baseline.get('started', 'unknown')}:")
+    differing = sorted(
+        key for key, value in results['settings'].items()
+        if key not in ('log_level', 'max_regression') and baseline.get('settings', {}).get(key) != value
+    )
+    if differing:
+        print(f"  warning: baseline ran with different settings ({', '.join(differing)})")
+    for current in results['scenarios']:
+        before = previous.get(current['scenario'])
+        if before is None:
+            continue
+        checks = (
+            ('throughput', before['throughput'], current['throughput'], -1),
+            ('p95', before['p95'], current['p95'], 1),
+            ('peak_rss_mb', before['peak_rss_mb'], current['peak_rss_mb'], 1)
+        )
+        for metric, old, new, direction in checks:
+            if not old:
+                continue
+            change = (new - old) / old
+            marker = ''
+            if change * direction > max_regression:
+                marker = '  REGRESSION'
+                regressions.append(f"{current['scenario']} {metric}: {old} -> {new} ({change:+.1%})")
+            print(f"  {current['scenario']:<20} {metric:<12} {old:>10} -> {new:<10} {change:+7.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the workflow engine against local fake APIs')
+    parser.add_argument('--clients', type=int, default=1000, help='Synthetic clients (1k-10k)')
+    parser.add_argument('--workers', type=int, default=32, help='Engine worker threads (global.max_workers)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Mean fake API latency')
+    parser.add_argument('--jitter-ms', type=float, default=10.0, help='Uniform +/- latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--semrush-rows', type=int, default=200, help='Rows in each SEMrush domain_organic export')
+    parser.add_argument('--content-kb', type=int, default=4, help='Approximate size of generated content')
+    parser.add_argument('--media-kb', type=int, default=0, help='Attach a photo of about this size to every upload (0: none)')
+    parser.add_argument('--media-files', type=int, default=8, help='Distinct photos cycled through the uploads')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for latency jitter and injected errors')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against a previous --output file')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed relative regression before exiting with status 1')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary working directory')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    engine = load_engine()
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    settings = FakeSettings(args.latency_ms, args.jitter_ms, args.error_rate,
+                            args.semrush_rows, args.content_kb, args.seed)
+    parent, child = multiprocessing.Pipe()
+    fakes = multiprocessing.Process(target=serve_fakes, args=(settings, child), daemon=True)
+    fakes.start()
+    urls, gbp_upload_url = parent.recv()
+
+    workdir = tempfile.mkdtemp(prefix='seo-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)  # relative state paths (config snapshot, logs) stay out of the checkout
+    results: Dict[str, Any] = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'keep')},
+        'scenarios': []
+    }
+    try:
+        config_file = write_config(workdir, args.clients, urls, gbp_upload_url, args.workers)
+        photos = write_photos(workdir, args.media_files, args.media_kb) if args.media_kb else []
+        workflow = engine.SEOAutomationWorkflow(
+            config_file, max_workers=args.workers, use_cache=False, config_snapshot=False, env_file=None
+        )
+        client_ids = list(workflow.config['clients'])
+
+        print(f"{args.clients} clients, {args.workers} workers, fake latency {args.latency_ms}ms "
+              f"+/-{args.jitter_ms}ms, error rate {args.error_rate:.1%}, {args.semrush_rows} SEMrush rows")
+        for scenario in scenarios:
+            if scenario == 'uploads':
+                results['scenarios'].append(bench_uploads(workflow, client_ids, args.workers, photos))
+            elif scenario == 'upload_batch':
+                # Batch generation primes the generation cache, so this run needs the caches
+                batch_workflow = engine.SEOAutomationWorkflow(
+                    config_file, max_workers=args.workers, use_cache=True, env_file=None
+                )
+                results['scenarios'].append(bench_upload_batch(batch_workflow, client_ids, workdir, photos))
+                batch_workflow.media.close()
+            elif scenario == 'daily_ranking_check':
+                results['scenarios'].append(bench_all_clients(scenario, workflow.daily_ranking_check))
+            elif scenario == 'monthly_reporting':
+                results['scenarios'].append(bench_all_clients(scenario, workflow.monthly_reporting))
+        workflow.media.close()
+    finally:
+        os.chdir(cwd)
+        parent.send('stop')
+        results['fake_apis'] = parent.recv()
+        fakes.join(timeout=5)
+        if args.keep:
+            print(f"Kept working directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for provider, stats in results['fake_apis'].items():
+        print(f"  {provider:<24} {stats['requests']:>7} requests  {stats['errors']:>5} injected errors  "
+              f"{stats['sent_bytes'] / 1e6:8.1f}MB sent")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} regressions beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
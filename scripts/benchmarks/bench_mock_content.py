@@ -0,0 +1,53 @@
+"""
+Benchmark fallback content rendering
+Usage: python scripts/benchmarks/bench_mock_content.py [--documents 20000] [--industry construction]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_templates import ContentTemplates  # noqa: E402
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config')
+
+SERVICES = ['Kitchen Renovation', 'Bathroom Remodel', 'Deck Construction', 'Water Heater Repair']
+LOCATIONS = ['Springfield, IL', 'Chicago, IL', 'Peoria, IL', 'Naperville, IL']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fallback content rendering')
+    parser.add_argument('--documents', type=int, default=20000, help='Documents to render')
+    parser.add_argument('--industry', default='construction', help='Industry template to render')
+    parser.add_argument('--templates', default=os.path.join(CONFIG_DIR, 'content_templates.yaml'))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    templates = ContentTemplates(args.templates)
+    load_time = time.perf_counter() - started
+
+    uploads = [
+        {
+            'type': 'photo',
+            'title': f'Project {n}',
+            'description': f'Completed project number {n} for a returning customer.',
+            'service': SERVICES[n % len(SERVICES)],
+            'location': LOCATIONS[n % len(LOCATIONS)]
+        }
+        for n in range(args.documents)
+    ]
+
+    started = time.perf_counter()
+    for n, upload in enumerate(uploads):
+        templates.render(upload, args.industry, business_name=f'Client {n % 50}', website='https://example.com')
+    elapsed = time.perf_counter() - started
+
+    print(f"Loaded templates in {load_time * 1000:.1f}ms")
+    print(f"Rendered {args.documents} documents in {elapsed:.3f}s "
+          f"({args.documents / elapsed:,.0f} docs/s, {elapsed / args.documents * 1e6:.1f}us/doc)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""
+Local stand-ins for the WordPress, GBP, SEMrush, GA4 and OpenAI APIs
+Each provider gets its own HTTP/1.1 keep-alive server on 127.0.0.1 with
+configurable latency, error rate and payload size. Responses follow the
+shapes scripts/automation-workflow.py parses, including paged SEMrush
+exports, the OpenAI files/batches endpoints and WordPress/GBP media uploads.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+PROVIDERS = ('wordpress', 'google_business_profile', 'semrush', 'google_analytics_4', 'openai')
+
+
+class FakeSettings:
+    """Behaviour shared by all fake servers"""
+
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 10.0, error_rate: float = 0.0,
+                 semrush_rows: int = 200, content_kb: int = 4, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.semrush_rows = semrush_rows
+        self.content_kb = content_kb
+        self.random = random.Random(seed)
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    settings: FakeSettings
+    provider: str
+    server_state: Dict[str, Any]
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    return b''.join(parts)
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def handle_request(self, method: str):
+        body = self.read_body()
+        length = len(body)
+        state = self.server_state
+        with state['lock']:
+            state['requests'] += 1
+            state['received_bytes'] += length
+
+        time.sleep(self.settings.delay())
+        if self.settings.error_rate and self.settings.random.random() < self.settings.error_rate:
+            with state['lock']:
+                state['errors'] += 1
+            self.send_json(503, {'error': 'injected failure'}, {'Retry-After': '0'})
+            return
+
+        url = urlparse(self.path)
+        try:
+            self.route(method, url.path, parse_qs(url.query), body)
+        except Exception as e:  # a broken fake should fail loudly in the benchmark output
+            self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def route(self, method: str, path: str, query: Dict[str, List[str]], body: bytes):
+        self.send_json(404, {'error': f"no route for {method} {path}"})
+
+    def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        self.send_body(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def send_body(self, status: int, data: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server_state['lock']:
+            self.server_state['sent_bytes'] += len(data)
+
+    def send_chunked(self, status: int, chunks: Iterable[bytes], content_type: str):
+        """Stream a body of unknown length (large SEMrush exports) with chunked encoding"""
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        sent = 0
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b'\r\n')
+                sent += len(chunk)
+        self.wfile.write(b'0\r\n\r\n')
+        with self.server_state['lock']:
+            self.server_state['sent_bytes'] += sent
+
+
+class WordPressHandler(FakeHandler):
+    def route(self, method, path, query, body):
+        if method == 'POST' and path.endswith('/wp-json/wp/v2/posts'):
+            post = json.loads(body or b'{}')
+            post_id = next(self.server_state['ids'])
+            slug = re.sub(r'[^a-z0-9]+', '-', post.get('title', '').lower()).strip('-')
+            self.send_json(201, {
+                'id': post_id,
+                'title': {'rendered': post.get('title')},
+                'link': f"http://{self.headers.get('Host')}/blog/{slug}-{post_id}",
+                'status': post.get('status', 'publish'),
+                'date': datetime.now().isoformat()
+            })
+        elif method == 'POST' and path.endswith('/wp-json/wp/v2/media'):
+            media_id = next(self.server_state['ids'])
+            filename = re.search(r'filename="?([^";]+)', self.headers.get('Content-Disposition', ''))
+            name = filename.group(1) if filename else f"upload-{media_id}"
+            self.send_json(201, {
+                'id': media_id,
+                'source_url': f"http://{self.headers.get('Host')}/wp-content/uploads/{name}",
+                'alt_text': query.get('alt_text', [''])[0],
+                'media_type': 'image',
+                'mime_type': self.headers.get('Content-Type'),
+                'media_details': {'filesize': len(body)}
+            })
+        else:
+            super().route(method, path, query, body)
+
+
+class GBPHandler(FakeHandler):
+    def route(self, method, path, query, body):
+        state = self.server_state
+        location = re.match(r'^/v4/accounts/[^/]+/locations/([^/]+)/(posts|media|media:startUpload)$', path)
+        if method == 'POST' and location and location.group(2) == 'posts':
+            post = json.loads(body or b'{}')
+            self.send_json(200, {
+                'name': f"accounts/0/locations/{location.group(1)}/posts/{next(state['ids'])}",
+                'summary': post.get('summary'),
+                'createTime': datetime.now().isoformat(),
+                'state': 'LIVE'
+            })
+        elif method == 'POST' and location and location.group(2) == 'media:startUpload':
+            self.send_json(200, {'resourceName': f"upload-{next(state['ids'])}"})
+        elif method == 'POST' and path.startswith('/upload/v1/media/'):
+            with state['lock']:
+                state['files'][path.rsplit('/', 1)[1]] = len(body)
+            self.send_json(200, {})
+        elif method == 'POST' and location and location.group(2) == 'media':
+            item = json.loads(body or b'{}')
+            resource = (item.get('dataRef') or {}).get('resourceName')
+            if resource not in state['files']:
+                return self.send_json(400, {'error': f"unknown dataRef {resource}"})
+            self.send_json(200, {
+                'name': f"accounts/0/locations/{location.group(1)}/media/{next(state['ids'])}",
+                'mediaFormat': item.get('mediaFormat'),
+                'googleUrl': f"http://{self.headers.get('Host')}/media/{resource}",
+                'description': item.get('description')
+            })
+        else:
+            super().route(method, path, query, body)
+
+
+class SEMrushHandler(FakeHandler):
+    def route(self, method, path, query, body):
+        if method != 'GET' or query.get('type', [''])[0] != 'domain_organic':
+            return super().route(method, path, query, body)
+        offset = int(query.get('display_offset', ['0'])[0])
+        limit = int(query.get('display_limit', ['10000'])[0])
+        count = max(0, min(limit, self.settings.semrush_rows - offset))
+        if not count:
+            return self.send_body(200, b'ERROR 50 :: NOTHING FOUND\n', 'text/plain')
+        domain = query.get('domain', [''])[0]
+        seed = sum(domain.encode('utf-8'))
+
+        def rows():
+            yield b'Keyword|Position|Search Volume|Keyword Difficulty|CPC\n'
+            lines = []
+            for n in range(offset, offset + count):
+                lines.append(f"keyword {n} {domain}|{(n * 7 + seed) % 100 + 1}|{1000 + n % 5000}|{n % 100}|{n % 50 / 10:.2f}\n")
+                if len(lines) == 1000:
+                    yield ''.join(lines).encode('utf-8')
+                    lines = []
+            yield ''.join(lines).encode('utf-8')
+
+        self.send_chunked(200, rows(), 'text/plain; charset=utf-8')
+
+
+class GA4Handler(FakeHandler):
+    def route(self, method, path, query, body):
+        if method != 'POST' or not path.endswith(':runReport'):
+            return super().route(method, path, query, body)
+        request = json.loads(body or b'{}')
+        date_range = (request.get('dateRanges') or [{}])[0]
+        day = datetime.strptime(date_range.get('startDate', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d')
+        end = datetime.strptime(date_range.get('endDate', day.strftime('%Y-%m-%d')), '%Y-%m-%d')
+        rows = []
+        while day <= end:
+            n = day.toordinal()
+            rows.append({
+                'dimensionValues': [{'value': day.strftime('%Y%m%d')}],
+                'metricValues': [{'value': str(v)} for v in (
+                    100 + n % 50, 80 + n % 40, 300 + n % 120, round(0.3 + n % 10 / 100, 3), 150 + n % 60, n % 12
+                )]
+            })
+            day += timedelta(days=1)
+        self.send_json(200, {'rows': rows, 'rowCount': len(rows)})
+
+
+class OpenAIHandler(FakeHandler):
+    def generated(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = (body.get('messages') or [{}])[-1].get('content', '')
+        title = next((line.split(':', 1)[1].strip() for line in prompt.splitlines()
+                      if line.strip().startswith('Title:')), 'Project')
+        paragraph = f"{title} delivered with care and quality materials. " * 8
+        content = {
+            'title': f"Complete Guide to {title}",
+            'metaDescription': f"{title}: professional service with quality results."[:160],
+            'content': '\n\n'.join([f"# {title}"] + [paragraph] * max(1, self.settings.content_kb * 1024 // len(paragraph))),
+            'schemaJson': json.dumps({'@context': 'https://schema.org', '@type': 'Article', 'headline': title}),
+            'hashtags': ['construction', 'renovation'],
+            'gbpSummary': f"Completed {title}."
+        }
+        return {
+            'id': f"chatcmpl-{next(self.server_state['ids'])}",
+            'object': 'chat.completion',
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': json.dumps(content)},
+                         'finish_reason': 'stop'}]
+        }
+
+    def route(self, method, path, query, body):
+        state = self.server_state
+        if method == 'POST' and path.endswith('/chat/completions'):
+            return self.send_json(200, self.generated(json.loads(body or b'{}')))
+
+        if method == 'POST' and path.endswith('/files'):
+            # Multipart body: the JSONL batch input is the only part made of JSON lines
+            lines = []
+            for line in body.decode('utf-8', 'replace').splitlines():
+                if line.startswith('{'):
+                    lines.append(json.loads(line))
+            file_id = f"file-{next(state['ids'])}"
+            with state['lock']:
+                state['files'][file_id] = '\n'.join(json.dumps(line) for line in lines)
+            return self.send_json(200, {'id': file_id, 'object': 'file', 'purpose': 'batch'})
+
+        if method == 'POST' and path.endswith('/batches'):
+            request = json.loads(body or b'{}')
+            batch_id = f"batch-{next(state['ids'])}"
+            output_id = f"file-{next(state['ids'])}"
+            outputs = []
+            for line in state['files'].get(request.get('input_file_id'), '').splitlines():
+                item = json.loads(line)
+                outputs.append(json.dumps({
+                    'id': f"batch_req_{next(state['ids'])}",
+                    'custom_id': item['custom_id'],
+                    'response': {'status_code': 200, 'body': self.generated(item.get('body') or {})},
+                    'error': None
+                }))
+            batch = {'id': batch_id, 'object': 'batch', 'status': 'completed',
+                     'input_file_id': request.get('input_file_id'), 'output_file_id': output_id,
+                     'error_file_id': None, 'request_counts': {'total': len(outputs), 'completed': len(outputs)}}
+            with state['lock']:
+                state['files'][output_id] = '\n'.join(outputs)
+                state['batches'][batch_id] = batch
+            return self.send_json(200, batch)
+
+        match = re.match(r'^.*/batches/([^/]+)$', path)
+        if method == 'GET' and match and match.group(1) in state['batches']:
+            return self.send_json(200, state['batches'][match.group(1)])
+
+        match = re.match(r'^.*/files/([^/]+)/content$', path)
+        if method == 'GET' and match and match.group(1) in state['files']:
+            return self.send_body(200, state['files'][match.group(1)].encode('utf-8'), 'application/jsonl')
+
+        super().route(method, path, query, body)
+
+
+HANDLERS = {
+    'wordpress': WordPressHandler,
+    'google_business_profile': GBPHandler,
+    'semrush': SEMrushHandler,
+    'google_analytics_4': GA4Handler,
+    'openai': OpenAIHandler
+}
+
+# Path prefix each provider's base_url carries (mirrors the real APIs)
+BASE_PATHS = {
+    'wordpress': '',
+    'google_business_profile': '/v4',
+    'semrush': '',
+    'google_analytics_4': '/v1beta',
+    'openai': '/v1'
+}
+
+
+class _Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def __next__(self) -> int:
+        with self.lock:
+            self.value += 1
+            return self.value
+
+
+class FakeAPIServers:
+    """Starts one fake server per provider; use as a context manager"""
+
+    def __init__(self, settings: Optional[FakeSettings] = None):
+        self.settings = settings or FakeSettings()
+        self.servers: Dict[str, ThreadingHTTPServer] = {}
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.threads: List[threading.Thread] = []
+
+    def start(self) -> 'FakeAPIServers':
+        for provider in PROVIDERS:
+            state = {'lock': threading.Lock(), 'ids': _Counter(), 'requests': 0, 'errors': 0,
+                     'received_bytes': 0, 'sent_bytes': 0, 'files': {}, 'batches': {}}
+            handler = type(f"{HANDLERS[provider].__name__}Bound", (HANDLERS[provider],),
+                           {'settings': self.settings, 'provider': provider, 'server_state': state})
+            server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+            server.daemon_threads = True
+            server.request_queue_size = 1024
+            thread = threading.Thread(target=server.serve_forever, name=f"fake-{provider}", daemon=True)
+            thread.start()
+            self.servers[provider] = server
+            self.states[provider] = state
+            self.threads.append(thread)
+        return self
+
+    def url(self, provider: str) -> str:
+        host, port = self.servers[provider].server_address[:2]
+        return f"http://{host}:{port}{BASE_PATHS[provider]}"
+
+    def gbp_upload_url(self) -> str:
+        host, port = self.servers['google_business_profile'].server_address[:2]
+        return f"http://{host}:{port}/upload/v1/media"
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            provider: {key: state[key] for key in ('requests', 'errors', 'received_bytes', 'sent_bytes')}
+            for provider, state in self.states.items()
+        }
+
+    def close(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self) -> 'FakeAPIServers':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,222 @@
+"""
+Fast workflow.yaml loading
+Parses with the libyaml C loader when available and keeps a binary snapshot
+of the parsed config, revalidated against the source file's mtime, size and
+SHA-256. Clients are stored as individually pickled entries and only decoded
+when a run actually touches them. ${VAR} placeholders are expanded from the
+environment (and an optional .env file) after loading, so the snapshot never
+contains secrets.
+
+Snapshots are only read when owned by the current user and not writable by
+others, and are unpickled with a loader that refuses every global except the
+date types YAML produces, so a planted file cannot execute code.
+"""
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import re
+import stat as stat_module
+import tempfile
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, Iterator, Optional, Set
+
+import yaml
+
+try:
+    from dotenv import dotenv_values
+except ImportError:  # python-dotenv is optional; the process environment still works
+    dotenv_values = None
+
+logger = logging.getLogger(__name__)
+
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+DEFAULT_SNAPSHOT_DIR = '.cache/config'
+SNAPSHOT_VERSION = 2
+
+# The only globals a parsed YAML config can reference
+SAFE_GLOBALS = {('datetime', 'date'), ('datetime', 'datetime'), ('datetime', 'timedelta'), ('datetime', 'timezone')}
+
+ENV_PLACEHOLDER = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+
+class EnvResolver:
+    """Expands ${VAR} placeholders, caching each resolved string.
+
+    Values come from the process environment, falling back to the .env file.
+    A string that references an unset variable resolves to None, so callers
+    see the credential as missing rather than as a literal placeholder.
+    """
+
+    def __init__(self, env_file: Optional[str] = '.env', environ: Optional[Dict[str, str]] = None):
+        self.values: Dict[str, str] = {}
+        if env_file and os.path.isfile(env_file):
+            if dotenv_values is None:
+                logger.warning(f"python-dotenv is not installed, ignoring {env_file}")
+            else:
+                self.values.update({k: v for k, v in dotenv_values(env_file).items() if v is not None})
+        self.values.update(os.environ if environ is None else environ)
+        self.resolved: Dict[str, Optional[str]] = {}
+        self.missing: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def resolve(self, value: Any) -> Any:
+        """Return value with placeholders expanded in every nested string"""
+        if isinstance(value, str):
+            return self.resolve_string(value) if '${' in value else value
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        return value
+
+    def resolve_string(self, text: str) -> Optional[str]:
+        if text in self.resolved:
+            return self.resolved[text]
+        names = ENV_PLACEHOLDER.findall(text)
+        unset = [name for name in names if not self.values.get(name)]
+        result = None if unset else ENV_PLACEHOLDER.sub(lambda m: self.values[m.group(1)], text)
+        with self.lock:
+            self.missing.update(unset)
+            self.resolved[text] = result
+        return result
+
+
+class SafeUnpickler(pickle.Unpickler):
+    """Unpickles plain data only: containers, scalars and datetime values"""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) in SAFE_GLOBALS:
+            return getattr(datetime, name)
+        raise pickle.UnpicklingError(f"config snapshot references {module}.{name}")
+
+
+def safe_loads(data: bytes) -> Any:
+    return SafeUnpickler(io.BytesIO(data)).load()
+
+
+class ClientIndex(Mapping):
+    """Read-only mapping of client id -> client settings, decoded on first access"""
+
+    def __init__(self, encoded: Dict[str, bytes], resolve: Optional[Callable[[Any], Any]] = None):
+        self.encoded = encoded
+        self.resolve = resolve
+        self.decoded: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def __getitem__(self, client_id: str) -> Any:
+        value = self.decoded.get(client_id)
+        if value is None:
+            value = safe_loads(self.encoded[client_id])
+            if self.resolve is not None:
+                value = self.resolve(value)
+            with self.lock:
+                value = self.decoded.setdefault(client_id, value)
+        return value
+
+    def __contains__(self, client_id: object) -> bool:
+        return client_id in self.encoded
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.encoded)
+
+    def __len__(self) -> int:
+        return len(self.encoded)
+
+
+def encode_clients(clients: Dict[str, Any]) -> Dict[str, bytes]:
+    return {
+        client_id: pickle.dumps(settings, protocol=pickle.HIGHEST_PROTOCOL)
+        for client_id, settings in clients.items()
+    }
+
+
+def parse_yaml(path: str) -> Dict[str, Any]:
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=YamlLoader) or {}
+
+
+def snapshot_path(path: str, snapshot_dir: str) -> str:
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{os.path.basename(path)}.{digest}.pickle")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def trusted(path: str, st: os.stat_result) -> bool:
+    """Owned by this user and not writable by group or others"""
+    owner = os.geteuid() if hasattr(os, 'geteuid') else st.st_uid
+    return st.st_uid == owner and not st.st_mode & (stat_module.S_IWGRP | stat_module.S_IWOTH)
+
+
+def read_snapshot(path: str, source: os.stat_result, source_hash: str) -> Optional[Dict[str, Any]]:
+    """The snapshot's data if its JSON header matches the source file, checked before unpickling"""
+    try:
+        with open(path, 'rb') as f:
+            if not trusted(path, os.fstat(f.fileno())):
+                logger.warning(f"Ignoring config snapshot {path}: not owned by this user or writable by others")
+                return None
+            header = json.loads(f.readline())
+            if header != {'version': SNAPSHOT_VERSION, 'mtime_ns': source.st_mtime_ns,
+                          'size': source.st_size, 'sha256': source_hash}:
+                return None
+            return SafeUnpickler(f).load()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable config snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(path: str, source: os.stat_result, source_hash: str,
+                   sections: Dict[str, Any], clients: Dict[str, bytes]):
+    """Write atomically so concurrent CLI runs never see a partial snapshot"""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')  # created 0600
+        with os.fdopen(fd, 'wb') as f:
+            header = {'version': SNAPSHOT_VERSION, 'mtime_ns': source.st_mtime_ns,
+                      'size': source.st_size, 'sha256': source_hash}
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            pickle.dump({'sections': sections, 'clients': clients}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not write config snapshot {path}: {e}")
+
+
+def load_config(path: str, snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR,
+                resolver: Optional[EnvResolver] = None) -> Dict[str, Any]:
+    """Load a workflow config, reusing the binary snapshot while the YAML is unchanged.
+
+    Pass snapshot_dir=None to always parse the YAML. The returned dict's
+    'clients' entry is a ClientIndex rather than a plain dict; with a
+    resolver, placeholders are expanded (clients on first access).
+    """
+    stat = os.stat(path)
+    cached = snapshot_path(path, snapshot_dir) if snapshot_dir else None
+    source_hash = file_sha256(path) if cached else ''
+
+    snapshot = read_snapshot(cached, stat, source_hash) if cached else None
+    if snapshot is not None:
+        sections, clients = snapshot['sections'], snapshot['clients']
+    else:
+        sections = parse_yaml(path)
+        clients = encode_clients(sections.pop('clients', None) or {})
+        if cached:
+            write_snapshot(cached, stat, source_hash, sections, clients)
+
+    config = resolver.resolve(sections) if resolver is not None else dict(sections)
+    config['clients'] = ClientIndex(clients, resolver.resolve if resolver is not None else None)
+    return config
@@ -0,0 +1,129 @@
+"""
+Pre-compiled fallback content templates, one set per client industry
+Templates are parsed and validated once; rendering is a handful of
+format_map calls plus string concatenation of prebuilt schema fragments
+"""
+import json
+import string
+import threading
+from datetime import date
+from typing import Dict, List, Any, Optional, Tuple
+
+from config_loader import parse_yaml
+
+TEXT_FIELDS = ('title', 'meta_description', 'content', 'gbp_summary')
+TEMPLATE_VARIABLES = {'title', 'service', 'location', 'upload_title', 'description', 'business_name', 'website'}
+
+_HEADLINE = '__HEADLINE__'
+_DESCRIPTION = '__DESCRIPTION__'
+_DATE = '__DATE_PUBLISHED__'
+
+
+def compile_text(name: str, text: str) -> str:
+    """Validate a template's placeholders up front so rendering can't fail on a typo"""
+    text = text.strip()
+    for _, field, _, _ in string.Formatter().parse(text):
+        if field is not None and field not in TEMPLATE_VARIABLES:
+            raise ValueError(f"Unknown placeholder {{{field}}} in content template '{name}'")
+    return text
+
+
+def schema_fragments(business_name: str, website: str) -> Tuple[str, str, str, str]:
+    """Serialize the constant schema.org Article skeleton once, split around the per-document values"""
+    skeleton = json.dumps({
+        "@context": "https://schema.org",
+        "@type": "Article",
+        "headline": _HEADLINE,
+        "description": _DESCRIPTION,
+        "author": {
+            "@type": "Organization",
+            "name": business_name
+        },
+        "publisher": {
+            "@type": "Organization",
+            "name": business_name
+        },
+        "datePublished": _DATE,
+        "mainEntityOfPage": {
+            "@type": "WebPage",
+            "@id": f"{website.rstrip('/')}/blog"
+        }
+    })
+    head, rest = skeleton.split(json.dumps(_HEADLINE))
+    middle, rest = rest.split(json.dumps(_DESCRIPTION))
+    before_date, tail = rest.split(json.dumps(_DATE))
+    return head, middle, before_date, tail
+
+
+class CompiledTemplate:
+    """One industry's templates with its schema fragments cached per business"""
+
+    __slots__ = ('name', 'texts', 'hashtags', 'business_name', 'website', 'fragments', 'lock')
+
+    def __init__(self, name: str, definition: Dict[str, Any]):
+        self.name = name
+        self.texts = {field: compile_text(f"{name}.{field}", definition[field]) for field in TEXT_FIELDS}
+        self.hashtags: List[str] = list(definition.get('hashtags', []))
+        self.business_name = definition.get('business_name', '')
+        self.website = definition.get('website', '')
+        self.fragments: Dict[Tuple[str, str], Tuple[str, str, str, str]] = {}
+        self.lock = threading.Lock()
+
+    def schema(self, business_name: str, website: str) -> Tuple[str, str, str, str]:
+        key = (business_name, website)
+        fragments = self.fragments.get(key)
+        if fragments is None:
+            fragments = schema_fragments(business_name, website)
+            with self.lock:
+                self.fragments[key] = fragments
+        return fragments
+
+    def render(self, upload_data: Dict[str, Any], business_name: Optional[str] = None,
+               website: Optional[str] = None) -> Dict[str, Any]:
+        service = upload_data['service']
+        values = {
+            'service': service,
+            'location': upload_data['location'],
+            'upload_title': upload_data['title'],
+            'description': upload_data['description'],
+            'business_name': business_name or self.business_name,
+            'website': website or self.website
+        }
+        texts = self.texts
+        values['title'] = title = texts['title'].format_map(values)
+        meta_description = texts['meta_description'].format_map(values)
+
+        head, middle, before_date, tail = self.schema(values['business_name'], values['website'])
+        schema_json = ''.join((
+            head, json.dumps(title), middle, json.dumps(meta_description),
+            before_date, '"', date.today().isoformat(), '"', tail
+        ))
+
+        return {
+            "title": title,
+            "metaDescription": meta_description,
+            "content": texts['content'].format_map(values),
+            "schemaJson": schema_json,
+            "hashtags": self.hashtags + [service.lower().replace(' ', '')],
+            "gbpSummary": texts['gbp_summary'].format_map(values)
+        }
+
+
+class ContentTemplates:
+    """All compiled templates from a content_templates.yaml file"""
+
+    def __init__(self, path: str):
+        data = parse_yaml(path)
+        default = data.get('default', {}) or {}
+        self.default = CompiledTemplate('default', default)
+        self.industries: Dict[str, CompiledTemplate] = {
+            industry: CompiledTemplate(industry, {**default, **(overrides or {})})
+            for industry, overrides in (data.get('industries', {}) or {}).items()
+        }
+
+    def for_industry(self, industry: Optional[str]) -> CompiledTemplate:
+        return self.industries.get((industry or '').lower(), self.default)
+
+    def render(self, upload_data: Dict[str, Any], industry: Optional[str] = None,
+               business_name: Optional[str] = None, website: Optional[str] = None) -> Dict[str, Any]:
+        return self.for_industry(industry).render(upload_data, business_name, website)
@@ -0,0 +1,144 @@
+"""
+Content-addressed cache for generated SEO content
+Identical (normalized) uploads reuse earlier generations, and concurrent
+identical requests share a single in-flight OpenAI call
+"""
+import copy
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Optional
+
+from response_cache import ResponseCache
+
+# Upload fields that influence the generated content
+UPLOAD_FIELDS = ('type', 'title', 'description', 'service', 'location')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(value: Any) -> str:
+    """Case-fold and collapse whitespace/trailing punctuation so trivial edits hash the same"""
+    if value is None:
+        return ''
+    return _WHITESPACE.sub(' ', str(value)).strip().strip('.!').casefold()
+
+
+def generation_key(client_id: str, upload_data: Dict[str, Any], model: str, temperature: float) -> Dict[str, Any]:
+    """Key material for a generation; clients never share content"""
+    return {
+        'client_id': client_id,
+        'model': model,
+        'temperature': temperature,
+        'upload': {field: normalize_text(upload_data.get(field)) for field in UPLOAD_FIELDS}
+    }
+
+
+class GenerationCache:
+    """In-memory LRU in front of an optional persistent ResponseCache, with request coalescing"""
+
+    def __init__(self, memory_entries: int = 1000, persistent: Optional[ResponseCache] = None):
+        self.memory_entries = max(0, memory_entries)
+        self.persistent = persistent
+        self.memory: 'OrderedDict[str, Any]' = OrderedDict()
+        self.inflight: Dict[str, Future] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['GenerationCache']:
+        settings = config.get('generation_cache', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        persistent = None
+        if settings.get('persist', True):
+            persistent = ResponseCache(
+                settings.get('path', '.cache/generations.sqlite3'),
+                default_ttl=settings.get('ttl_seconds', 30 * 24 * 3600),
+                max_size_mb=settings.get('max_size_mb', 64)
+            )
+        return cls(settings.get('memory_entries', 1000), persistent)
+
+    @staticmethod
+    def digest(key: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get_or_generate(self, key: Dict[str, Any], generate: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return cached content for key, or run generate() once even under concurrent callers"""
+        digest = self.digest(key)
+        with self.lock:
+            if digest in self.memory:
+                self.memory.move_to_end(digest)
+                self.hits += 1
+                return copy.deepcopy(self.memory[digest])
+            pending = self.inflight.get(digest)
+            leader = pending is None
+            if leader:
+                pending = self.inflight[digest] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(pending.result())
+
+        try:
+            value = self.persistent.get('openai', 'generation', {'digest': digest}) if self.persistent else None
+            with self.lock:
+                if value is not None:
+                    self.persistent_hits += 1
+                else:
+                    self.misses += 1
+            if value is None:
+                value = generate()
+                if self.persistent:
+                    self.persistent.put('openai', 'generation', {'digest': digest}, value)
+            self._remember(digest, value)
+            pending.set_result(value)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(digest, None)
+        return copy.deepcopy(value)
+
+    def contains(self, key: Dict[str, Any]) -> bool:
+        digest = self.digest(key)
+        with self.lock:
+            if digest in self.memory or digest in self.inflight:
+                return True
+        return bool(self.persistent and self.persistent.get('openai', 'generation', {'digest': digest}) is not None)
+
+    def prime(self, key: Dict[str, Any], value: Dict[str, Any]):
+        """Store content produced outside get_or_generate (e.g. by a batch job)"""
+        digest = self.digest(key)
+        if self.persistent:
+            self.persistent.put('openai', 'generation', {'digest': digest}, value)
+        self._remember(digest, value)
+
+    def _remember(self, digest: str, value: Dict[str, Any]):
+        if not self.memory_entries:
+            return
+        with self.lock:
+            self.memory[digest] = value
+            self.memory.move_to_end(digest)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.persistent_hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'persistent_hits': self.persistent_hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'hit_rate': (lookups - self.misses) / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory)
+            }
@@ -0,0 +1,151 @@
+"""
+Pooled HTTP transport with one tuned connection pool per API provider
+Settings come from transport.* with overrides under apis.<provider>.transport
+Streamed responses hold their pooled connection until closed; a request that
+waits longer than pool_timeout for a free connection fails instead of hanging.
+"""
+import socket
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import EmptyPoolError
+
+PROVIDERS = ('wordpress', 'google_business_profile', 'semrush', 'google_analytics_4', 'openai')
+
+DEFAULTS = {
+    'pool_connections': 10,  # distinct hosts cached per provider
+    'pool_maxsize': None,  # keep-alive connections per host; defaults to max_workers
+    'pool_block': True,  # wait for a free connection instead of opening throwaway ones
+    'pool_timeout': 30,  # seconds to wait for that connection before failing
+    'connect_timeout': 5,
+    'read_timeout': 30,
+    'tcp_keepalive': True
+}
+
+
+class BoundedWaitPool:
+    """Connection pool mixin applying pool_timeout, which requests never passes to urlopen"""
+    pool_timeout: Optional[float] = None
+
+    def urlopen(self, method, url, *args, **kwargs):
+        kwargs.setdefault('pool_timeout', self.pool_timeout)
+        return super().urlopen(method, url, *args, **kwargs)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled sockets and bounds the wait for one"""
+
+    def __init__(self, tcp_keepalive: bool = True, pool_timeout: Optional[float] = None, **kwargs):
+        self.socket_options = list(HTTPConnection.default_socket_options)
+        if tcp_keepalive:
+            self.socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        self.pool_timeout = pool_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(pool_class.__name__, (BoundedWaitPool, pool_class), {'pool_timeout': self.pool_timeout})
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class HTTPTransport:
+    """Per-provider requests sessions with bounded pools and default timeouts"""
+
+    def __init__(self, config: Dict[str, Any], max_workers: int = 8):
+        base = dict(DEFAULTS)
+        base.update(config.get('transport', {}) or {})
+        if not base.get('pool_maxsize'):
+            base['pool_maxsize'] = max_workers
+
+        apis = config.get('apis', {}) or {}
+        self.settings: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, requests.Session] = {}
+        self.adapters: Dict[str, KeepAliveAdapter] = {}
+        for provider in PROVIDERS:
+            settings = dict(base)
+            settings.update((apis.get(provider) or {}).get('transport', {}) or {})
+            self.settings[provider] = settings
+            self.sessions[provider], self.adapters[provider] = self._build_session(settings)
+
+        self.lock = threading.Lock()
+        self.counters = {provider: {'requests': 0, 'timeouts': 0, 'errors': 0} for provider in PROVIDERS}
+
+    @staticmethod
+    def _build_session(settings: Dict[str, Any]) -> Tuple[requests.Session, KeepAliveAdapter]:
+        session = requests.Session()
+        adapter = KeepAliveAdapter(
+            tcp_keepalive=settings['tcp_keepalive'],
+            pool_connections=settings['pool_connections'],
+            pool_maxsize=settings['pool_maxsize'],
+            pool_block=settings['pool_block'],
+            pool_timeout=settings['pool_timeout'],
+            max_retries=0  # retries are handled by RetryPolicy
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session, adapter
+
+    def timeout(self, provider: str) -> Tuple[float, float]:
+        settings = self.settings.get(provider, DEFAULTS)
+        return settings['connect_timeout'], settings['read_timeout']
+
+    def request(self, provider: str, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the provider's pool, applying its default timeouts"""
+        session = self.sessions[provider]
+        kwargs.setdefault('timeout', self.timeout(provider))
+        counters = self.counters[provider]
+        try:
+            response = session.request(method, url, **kwargs)
+        except EmptyPoolError as e:
+            # requests passes this through unwrapped; surface it as a retryable connection error
+            with self.lock:
+                counters['requests'] += 1
+                counters['timeouts'] += 1
+            raise requests.ConnectionError(
+                f"No free {provider} connection within {self.settings[provider]['pool_timeout']}s "
+                f"(pool_maxsize {self.settings[provider]['pool_maxsize']}); is a streamed response left open?"
+            ) from e
+        except requests.Timeout:
+            with self.lock:
+                counters['requests'] += 1
+                counters['timeouts'] += 1
+            raise
+        except requests.RequestException:
+            with self.lock:
+                counters['requests'] += 1
+                counters['errors'] += 1
+            raise
+        with self.lock:
+            counters['requests'] += 1
+        return response
+
+    def stats(self, provider: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Requests, connection reuse and timeout counts per provider"""
+        stats = {}
+        for name in PROVIDERS:
+            if provider is not None and name != provider:
+                continue
+            opened = 0
+            pooled_requests = 0
+            pools = self.adapters[name].poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    pooled_requests += pool.num_requests
+            with self.lock:
+                counters = dict(self.counters[name])
+            counters['connections_opened'] = opened
+            counters['connections_reused'] = max(0, pooled_requests - opened)
+            stats[name] = counters
+        return stats
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
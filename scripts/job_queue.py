@@ -0,0 +1,459 @@
+"""
+Durable job queue for uploads, ranking checks and reports
+Jobs are leased to one worker at a time; a lease that is not completed or
+extended within the visibility timeout (e.g. the worker crashed) makes the
+job available again. Idempotency keys make resubmission safe. A handler
+may record progress in the job's payload; it is saved when the job is
+requeued, so a retry can skip work with side effects that already happened.
+
+Backends: SQLite (local, multi-process) and Redis (multi-node, optional).
+"""
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Any, NamedTuple, Optional, Tuple
+
+from retry import RETRYABLE_STATUSES, RetryBudget
+
+try:
+    import redis
+except ImportError:  # only needed for job_queue.backend: redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    lease_token: str
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job cannot help"""
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Failures a retry cannot fix: bad input, unknown clients and HTTP 4xx other than 408/425/429.
+
+    Wrappers such as the workflow engine's WorkflowError are classified by
+    the exception they were raised from.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, PermanentJobError):
+            return True
+        if getattr(error, 'delay', None) is not None:
+            return False
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status is not None:
+            return 400 <= status < 500 and status not in RETRYABLE_STATUSES
+        if isinstance(error, (KeyError, ValueError, TypeError)):
+            return True
+        error = error.__cause__
+    return False
+
+
+JOB_STATUSES = ('queued', 'leased', 'done', 'failed')
+
+
+class SQLiteJobQueue:
+    """Job queue in a SQLite table; safe to share between processes on one machine"""
+
+    def __init__(self, path: str, visibility_timeout: float = 600, max_attempts: int = 5):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode; lease() opens its own write transaction
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                idempotency_key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_token TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires)')
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+                delay: float = 0.0) -> Tuple[str, bool]:
+        """Add a job; returns (job id, created). An existing idempotency key returns its job instead"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO jobs (kind, payload, idempotency_key, status, available_at, created_at, updated_at) '
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (kind, json.dumps(payload, default=str), idempotency_key, now + delay, now, now)
+            )
+            if cursor.rowcount:
+                return str(cursor.lastrowid), True
+            row = self.conn.execute('SELECT id FROM jobs WHERE idempotency_key = ?', (idempotency_key,)).fetchone()
+        return str(row[0]), False
+
+    def lease(self, worker_id: str) -> Optional[Job]:
+        """Claim the next available job (or one whose lease expired) for visibility_timeout seconds"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'lease expired after final attempt', updated_at = ? "
+                    "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = self.conn.execute(
+                    "SELECT id, kind, payload, attempts FROM jobs "
+                    "WHERE (status = 'queued' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?) "
+                    "ORDER BY available_at, id LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute('COMMIT')
+                    return None
+                job_id, kind, payload, attempts = row
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_token = ?, lease_owner = ?, "
+                    "lease_expires = ?, updated_at = ? WHERE id = ?",
+                    (token, worker_id, now + self.visibility_timeout, now, job_id)
+                )
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+        return Job(str(job_id), kind, json.loads(payload), attempts + 1, token)
+
+    def heartbeat(self, job: Job) -> bool:
+        """Extend the lease; False if the lease was lost to another worker"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (now + self.visibility_timeout, now, int(job.id), job.lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job: Job, result: Any = None) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_token = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (json.dumps(result, default=str), time.time(), int(job.id), job.lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str, retry_in: Optional[float] = None) -> bool:
+        """Release a failed job: requeue it after retry_in seconds, or fail it for good.
+
+        The job's payload is written back, keeping any progress the handler recorded.
+        """
+        now = time.time()
+        retry = retry_in is not None and job.attempts < self.max_attempts
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, payload = ?, error = ?, lease_token = NULL, "
+                "updated_at = ? WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                ('queued' if retry else 'failed', now + (retry_in or 0), json.dumps(job.payload, default=str),
+                 error, now, int(job.id), job.lease_token)
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT id, kind, payload, status, attempts, result, error FROM jobs WHERE id = ?', (int(job_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': str(row[0]), 'kind': row[1], 'payload': json.loads(row[2]), 'status': row[3],
+            'attempts': row[4], 'result': json.loads(row[5]) if row[5] else None, 'error': row[6]
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status: queued (including delayed), leased, done, failed"""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        with self.lock:
+            rows = self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Redis layout under <prefix>: job:<id> hash, ready zset (score = available_at),
+# leased zset (score = lease expiry), idem:<key> -> id, seq counter,
+# finished hash (done/failed -> count)
+_REDIS_ENQUEUE = """
+local prefix, now, delay, kind, payload, key = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4], ARGV[5], ARGV[6]
+if key ~= '' then
+  local existing = redis.call('GET', prefix .. 'idem:' .. key)
+  if existing then return {existing, 0} end
+end
+local id = tostring(redis.call('INCR', prefix .. 'seq'))
+if key ~= '' then redis.call('SET', prefix .. 'idem:' .. key, id) end
+redis.call('HSET', prefix .. 'job:' .. id, 'kind', kind, 'payload', payload, 'status', 'queued',
+           'attempts', 0, 'created_at', now)
+redis.call('ZADD', prefix .. 'ready', now + delay, id)
+return {id, 1}
+"""
+
+_REDIS_LEASE = """
+local prefix, now, visibility, token, owner, max_attempts =
+  ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4], ARGV[5], tonumber(ARGV[6])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. 'leased', '-inf', now, 'LIMIT', 0, 100)) do
+  redis.call('ZREM', prefix .. 'leased', id)
+  local job = prefix .. 'job:' .. id
+  if tonumber(redis.call('HGET', job, 'attempts')) >= max_attempts then
+    redis.call('HSET', job, 'status', 'failed', 'error', 'lease expired after final attempt')
+    redis.call('HINCRBY', prefix .. 'finished', 'failed', 1)
+  else
+    redis.call('HSET', job, 'status', 'queued')
+    redis.call('ZADD', prefix .. 'ready', now, id)
+  end
+end
+local ids = redis.call('ZRANGEBYSCORE', prefix .. 'ready', '-inf', now, 'LIMIT', 0, 1)
+if #ids == 0 then return false end
+local id = ids[1]
+local job = prefix .. 'job:' .. id
+redis.call('ZREM', prefix .. 'ready', id)
+redis.call('ZADD', prefix .. 'leased', now + visibility, id)
+local attempts = redis.call('HINCRBY', job, 'attempts', 1)
+redis.call('HSET', job, 'status', 'leased', 'lease_token', token, 'lease_owner', owner)
+return {id, redis.call('HGET', job, 'kind'), redis.call('HGET', job, 'payload'), attempts}
+"""
+
+_REDIS_SETTLE = """
+local prefix, id, token, status, field, value, available_at, payload =
+  ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6], ARGV[7], ARGV[8]
+local job = prefix .. 'job:' .. id
+if redis.call('HGET', job, 'status') ~= 'leased' or redis.call('HGET', job, 'lease_token') ~= token then
+  return 0
+end
+redis.call('ZREM', prefix .. 'leased', id)
+redis.call('HSET', job, 'status', status, field, value, 'lease_token', '')
+if payload ~= '' then redis.call('HSET', job, 'payload', payload) end
+if status == 'queued' then
+  redis.call('ZADD', prefix .. 'ready', tonumber(available_at), id)
+else
+  redis.call('HINCRBY', prefix .. 'finished', status, 1)
+end
+return 1
+"""
+
+_REDIS_HEARTBEAT = """
+local prefix, id, token, expires = ARGV[1], ARGV[2], ARGV[3], tonumber(ARGV[4])
+local job = prefix .. 'job:' .. id
+if redis.call('HGET', job, 'status') ~= 'leased' or redis.call('HGET', job, 'lease_token') ~= token then
+  return 0
+end
+redis.call('ZADD', prefix .. 'leased', expires, id)
+return 1
+"""
+
+
+class RedisJobQueue:
+    """Same semantics as SQLiteJobQueue on any Redis-compatible server, for workers on several hosts"""
+
+    def __init__(self, url: str, prefix: str = 'seo:jobs:', visibility_timeout: float = 600, max_attempts: int = 5):
+        if redis is None:
+            raise RuntimeError("job_queue.backend is redis but the redis package is not installed")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._enqueue = self.client.register_script(_REDIS_ENQUEUE)
+        self._lease = self.client.register_script(_REDIS_LEASE)
+        self._settle = self.client.register_script(_REDIS_SETTLE)
+        self._heartbeat = self.client.register_script(_REDIS_HEARTBEAT)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+                delay: float = 0.0) -> Tuple[str, bool]:
+        job_id, created = self._enqueue(args=[
+            self.prefix, time.time(), delay, kind, json.dumps(payload, default=str), idempotency_key or ''
+        ])
+        return str(job_id), bool(int(created))
+
+    def lease(self, worker_id: str) -> Optional[Job]:
+        token = uuid.uuid4().hex
+        row = self._lease(args=[self.prefix, time.time(), self.visibility_timeout, token, worker_id, self.max_attempts])
+        if not row:
+            return None
+        job_id, kind, payload, attempts = row
+        return Job(str(job_id), kind, json.loads(payload), int(attempts), token)
+
+    def heartbeat(self, job: Job) -> bool:
+        expires = time.time() + self.visibility_timeout
+        return bool(self._heartbeat(args=[self.prefix, job.id, job.lease_token, expires]))
+
+    def complete(self, job: Job, result: Any = None) -> bool:
+        return bool(self._settle(args=[
+            self.prefix, job.id, job.lease_token, 'done', 'result', json.dumps(result, default=str), 0, ''
+        ]))
+
+    def fail(self, job: Job, error: str, retry_in: Optional[float] = None) -> bool:
+        retry = retry_in is not None and job.attempts < self.max_attempts
+        return bool(self._settle(args=[
+            self.prefix, job.id, job.lease_token, 'queued' if retry else 'failed', 'error', error,
+            time.time() + (retry_in or 0), json.dumps(job.payload, default=str)
+        ]))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.hgetall(f"{self.prefix}job:{job_id}")
+        if not data:
+            return None
+        return {
+            'id': str(job_id), 'kind': data['kind'], 'payload': json.loads(data['payload']),
+            'status': data['status'], 'attempts': int(data.get('attempts', 0)),
+            'result': json.loads(data['result']) if data.get('result') else None, 'error': data.get('error')
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status, in the same shape as SQLiteJobQueue.stats()"""
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts['queued'] = self.client.zcard(f"{self.prefix}ready")
+        counts['leased'] = self.client.zcard(f"{self.prefix}leased")
+        counts.update({status: int(count) for status, count in self.client.hgetall(f"{self.prefix}finished").items()})
+        return counts
+
+    def close(self):
+        self.client.close()
+
+
+def open_job_queue(config: Dict[str, Any]):
+    """Build the queue described by the job_queue config section"""
+    settings = config.get('job_queue', {}) or {}
+    visibility_timeout = settings.get('visibility_timeout_seconds', 600)
+    max_attempts = settings.get('max_attempts', 5)
+    backend = settings.get('backend', 'sqlite')
+    if backend == 'redis':
+        return RedisJobQueue(
+            settings.get('url', 'redis://localhost:6379/0'),
+            prefix=settings.get('prefix', 'seo:jobs:'),
+            visibility_timeout=visibility_timeout,
+            max_attempts=max_attempts
+        )
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown job_queue.backend: {backend}")
+    return SQLiteJobQueue(settings.get('path', '.cache/jobs.sqlite3'), visibility_timeout, max_attempts)
+
+
+class JobWorker:
+    """Leases jobs and runs them through `handlers` (kind -> handler(payload)).
+
+    While a handler runs, a heartbeat thread keeps extending the lease. A
+    handler exception requeues the job after `retry_delay(attempts)` seconds
+    (or the delay a RetryLater-style exception carries in `.delay`); errors
+    `is_permanent` accepts and unknown kinds fail the job immediately.
+    Handlers run under a RetryBudget kept in the payload (`retries_spent`):
+    a job whose requests used up error_handling.max_retries fails for good
+    instead of starting over, so queue attempts do not multiply HTTP retries.
+    `failed` counts jobs that failed for good, not attempts.
+    """
+
+    def __init__(self, queue, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 worker_id: Optional[str] = None, poll_interval: float = 1.0,
+                 retry_delay: Callable[[int], float] = lambda attempts: min(300.0, 2.0 ** attempts),
+                 is_permanent: Callable[[Exception], bool] = is_permanent_error):
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.is_permanent = is_permanent
+        self.processed = 0
+        self.failed = 0
+
+    def run(self, stop: Optional[threading.Event] = None, exit_when_idle: bool = False) -> Dict[str, int]:
+        """Process jobs until stop is set (or the queue is empty, with exit_when_idle)"""
+        stop = stop or threading.Event()
+        logger.info(f"Worker {self.worker_id} started")
+        while not stop.is_set():
+            if not self.run_one():
+                if exit_when_idle:
+                    break
+                stop.wait(self.poll_interval)
+        logger.info(f"Worker {self.worker_id} stopped: {self.processed} done, {self.failed} failed")
+        return {'processed': self.processed, 'failed': self.failed}
+
+    def run_one(self) -> bool:
+        """Lease and run a single job; False if none was available"""
+        job = self.queue.lease(self.worker_id)
+        if job is None:
+            return False
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), daemon=True)
+        heartbeat.start()
+        started = time.perf_counter()
+        budget = RetryBudget(job.payload.get('retries_spent', 0))
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise PermanentJobError(f"No handler for job kind '{job.kind}'")
+            with budget.active():
+                result = handler(job.payload)
+        except Exception as e:
+            if getattr(e, 'delay', None) is not None:  # RetryLater: resume from its retry count
+                job.payload['retries_spent'] = max(budget.spent, getattr(e, 'attempt', 0))
+            if self.is_permanent(e) or budget.exhausted:
+                self._fail(job, f"{type(e).__name__}: {e}", None)
+            else:
+                delay = getattr(e, 'delay', None)
+                self._fail(job, str(e), delay if delay is not None else self.retry_delay(job.attempts))
+        else:
+            if self.queue.complete(job, result):
+                self.processed += 1
+                logger.info(f"Job {job.id} ({job.kind}) done in {time.perf_counter() - started:.2f}s")
+            else:
+                logger.warning(f"Job {job.id} ({job.kind}) finished after its lease was lost; result dropped")
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def _fail(self, job: Job, error: str, retry_in: Optional[float]):
+        final = retry_in is None or job.attempts >= self.queue.max_attempts
+        if final:
+            self.failed += 1
+        logger.error(
+            f"Job {job.id} ({job.kind}) attempt {job.attempts} failed: {error}"
+            + ('' if final else f"; retrying in {retry_in:.1f}s")
+        )
+        self.queue.fail(job, error, retry_in)
+
+    def _heartbeat(self, job: Job, done: threading.Event):
+        interval = max(1.0, self.queue.visibility_timeout / 3)
+        while not done.wait(interval):
+            if not self.queue.heartbeat(job):
+                logger.warning(f"Lost lease on job {job.id} ({job.kind})")
+                return
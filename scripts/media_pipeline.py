@@ -0,0 +1,170 @@
+"""
+Photo preparation for WordPress and GBP media uploads
+Resizing and thumbnail rendering run in a process pool so large images do
+not hold the GIL of the threads driving API calls. Pillow is optional:
+without it (or for files it cannot decode) the original file is uploaded
+unchanged. Prepared files are cached by source path, size, mtime and
+settings, so a retried upload does not re-encode.
+"""
+import hashlib
+import logging
+import mimetypes
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; photos are then uploaded as-is
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+EXIF_ORIENTATION = 0x0112
+
+
+def media_files(upload_data: Dict[str, Any]) -> List[str]:
+    """Local image paths attached to an upload: `files`, `file_path` or the dashboard's `filePath`"""
+    files = upload_data.get('files') or []
+    if isinstance(files, str):
+        files = [files]
+    single = upload_data.get('file_path') or upload_data.get('filePath')
+    if single and single not in files:
+        files = [single] + list(files)
+    return [path for path in files if path]
+
+
+def original_media(path: str) -> Dict[str, Any]:
+    return {
+        'source': path,
+        'path': path,
+        'thumbnail': None,
+        'content_type': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+        'size': os.path.getsize(path),
+        'width': None,
+        'height': None
+    }
+
+
+def prepare_image(path: str, work_dir: str, max_dimension: int = 2048,
+                  thumbnail_size: int = 400, quality: int = 85) -> Dict[str, Any]:
+    """Downscale a photo to max_dimension (applying EXIF rotation) and render a thumbnail.
+
+    Runs in a worker process. Photos that are already small and upright are
+    uploaded as they are; only the thumbnail is written.
+    """
+    media = original_media(path)
+    if Image is None:
+        return media
+
+    stat = os.stat(path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{max_dimension}:{thumbnail_size}:{quality}".encode('utf-8')
+    ).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(work_dir, exist_ok=True)
+    thumbnail_path = os.path.join(work_dir, f"{stem}-{key}-thumb.jpg")
+
+    try:
+        with Image.open(path) as image:
+            rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+            resize = max(image.size) > max_dimension
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            extension, fmt = ('.png', 'PNG') if has_alpha else ('.jpg', 'JPEG')
+            output = os.path.join(work_dir, f"{stem}-{key}{extension}") if rotated or resize else path
+
+            if os.path.exists(output) and os.path.exists(thumbnail_path):
+                with Image.open(output) as prepared:
+                    width, height = prepared.size
+            else:
+                image = ImageOps.exif_transpose(image)
+                if resize:
+                    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+                if output != path:
+                    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+                        image = image.convert('RGB')
+                    write_atomic(image, output, fmt, quality)
+                width, height = image.size
+
+                thumbnail = image.copy()
+                thumbnail.thumbnail((thumbnail_size, thumbnail_size), Image.LANCZOS)
+                if thumbnail.mode not in ('RGB', 'L'):
+                    thumbnail = thumbnail.convert('RGB')
+                write_atomic(thumbnail, thumbnail_path, 'JPEG', quality)
+    except (OSError, Image.DecompressionBombError) as e:  # UnidentifiedImageError is an OSError
+        logger.warning(f"Uploading {path} unprocessed, it could not be decoded: {e}")
+        return media
+
+    media.update(
+        path=output,
+        thumbnail=thumbnail_path,
+        content_type=mimetypes.guess_type(output)[0] or media['content_type'],
+        size=os.path.getsize(output),
+        width=width,
+        height=height
+    )
+    return media
+
+
+def write_atomic(image, path: str, fmt: str, quality: int):
+    """Save via a temporary name so a concurrent reader never sees a partial file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    options = {'quality': quality, 'optimize': True} if fmt == 'JPEG' else {'optimize': True}
+    image.save(tmp, fmt, **options)
+    os.replace(tmp, path)
+
+
+class MediaProcessor:
+    """Prepares upload photos on a lazily started process pool"""
+
+    def __init__(self, work_dir: str = '.cache/media', workers: int = 2, max_dimension: int = 2048,
+                 thumbnail_size: int = 400, quality: int = 85):
+        self.work_dir = work_dir
+        self.workers = max(1, workers)
+        self.options = {'max_dimension': max_dimension, 'thumbnail_size': thumbnail_size, 'quality': quality}
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'MediaProcessor':
+        settings = config.get('media', {}) or {}
+        return cls(
+            work_dir=settings.get('work_dir', '.cache/media'),
+            workers=settings.get('workers', 2),
+            max_dimension=settings.get('max_dimension', 2048),
+            thumbnail_size=settings.get('thumbnail_size', 400),
+            quality=settings.get('quality', 85)
+        )
+
+    def pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # spawn: forking a process that is running HTTP and worker threads is unsafe
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.executor
+
+    def prepare(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """Prepared media for each existing path, in order; missing files are skipped with a warning"""
+        existing = []
+        for path in paths:
+            if os.path.isfile(path):
+                existing.append(path)
+            else:
+                logger.warning(f"Media file {path} does not exist, skipping")
+        if Image is None:
+            if existing:
+                logger.debug("Pillow is not installed, uploading photos without resizing")
+            return [original_media(path) for path in existing]
+
+        futures = [self.pool().submit(prepare_image, path, self.work_dir, **self.options) for path in existing]
+        return [future.result() for future in futures]
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
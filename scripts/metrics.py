@@ -0,0 +1,253 @@
+"""
+In-process metrics: counters and latency histograms with labels
+Exposed in Prometheus text format over a small HTTP server and as a JSON
+snapshot (written at the end of a CLI run)
+"""
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+DESCRIPTIONS = {
+    'seo_provider_call_seconds': ('histogram', 'Latency of provider operations'),
+    'seo_provider_calls_total': ('counter', 'Provider operations by outcome'),
+    'seo_http_requests_total': ('counter', 'HTTP requests sent to provider APIs by status'),
+    'seo_http_request_seconds': ('histogram', 'Latency of single HTTP requests to provider APIs'),
+    'seo_http_sent_bytes_total': ('counter', 'Request body bytes sent to provider APIs'),
+    'seo_http_received_bytes_total': ('counter', 'Response body bytes received from provider APIs'),
+    'seo_http_retries_total': ('counter', 'Retried provider requests'),
+    'seo_cache_lookups_total': ('counter', 'Cache lookups by cache and result'),
+    'seo_workflow_step_seconds': ('histogram', 'Latency of workflow steps'),
+    'seo_workflow_steps_total': ('counter', 'Workflow steps by outcome'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe labelled counters and histograms.
+
+    Provider calls record their client in a thread-local so the HTTP-level
+    metrics recorded underneath them carry the same client label. With
+    client_labels=False the client label is dropped to bound cardinality.
+    """
+
+    def __init__(self, enabled: bool = True, client_labels: bool = True):
+        self.enabled = enabled
+        self.client_labels = client_labels
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.time()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'MetricsRegistry':
+        monitoring = config.get('monitoring', {}) or {}
+        return cls(
+            enabled=monitoring.get('metrics_collection', True),
+            client_labels=monitoring.get('metrics_client_labels', True)
+        )
+
+    def labels(self, labels: Dict[str, Any]) -> Labels:
+        if 'client' in labels and not self.client_labels:
+            labels = {k: v for k, v in labels.items() if k != 'client'}
+        return tuple(sorted((k, '' if v is None else str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self.labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = self.labels(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @property
+    def current_client(self) -> Optional[str]:
+        return getattr(self.local, 'client', None)
+
+    @contextmanager
+    def call(self, provider: str, operation: str, client: Optional[str]) -> Iterator[None]:
+        """Time a provider operation and label nested HTTP metrics with its client"""
+        if not self.enabled:
+            yield
+            return
+        previous = self.current_client
+        self.local.client = client
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.local.client = previous
+            self.observe('seo_provider_call_seconds', time.perf_counter() - started,
+                         provider=provider, operation=operation, client=client)
+            self.inc('seo_provider_calls_total', provider=provider, operation=operation,
+                     client=client, outcome=outcome)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All series as plain JSON-serializable data"""
+        with self.lock:
+            counters = {
+                name: [{'labels': dict(labels), 'value': value} for labels, value in sorted(series.items())]
+                for name, series in self.counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        'labels': dict(labels),
+                        'count': h.count,
+                        'sum': h.sum,
+                        'avg': h.sum / h.count if h.count else 0.0,
+                        'p50': h.quantile(0.5),
+                        'p95': h.quantile(0.95),
+                        'p99': h.quantile(0.99),
+                        'max': h.max
+                    }
+                    for labels, h in sorted(series.items())
+                ]
+                for name, series in self.histograms.items()
+            }
+        return {
+            'started': self.started,
+            'uptime_seconds': time.time() - self.started,
+            'counters': counters,
+            'histograms': histograms
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str):
+            lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, (kind, name))[1]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                header(name, 'counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{format_labels(labels)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                header(name, 'histogram')
+                for labels, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS + (math.inf,), h.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == math.inf else f"{bound:g}"
+                        lines.append(f"{name}_bucket{format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{format_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logger.info(f"Wrote metrics to {path}")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class MetricsServer:
+    """Serves /metrics (Prometheus) and /metrics.json from a daemon thread"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] == '/metrics':
+                    body = registry_ref.prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path.split('?')[0] == '/metrics.json':
+                    body = json.dumps(registry_ref.snapshot()).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self) -> 'MetricsServer':
+        self.thread.start()
+        logger.info(f"Serving metrics on http://{self.address[0]}:{self.address[1]}/metrics")
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,116 @@
+"""
+Local SQLite store of daily GA4 rows per property
+Lets get_ga4_metrics fetch only new dates instead of the full history window
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+METRIC_COLUMNS = ('sessions', 'users', 'page_views', 'bounce_rate', 'avg_session_duration', 'conversions')
+
+
+def normalize_date(value: str) -> str:
+    """GA4 returns dates as YYYYMMDD; store them as YYYY-MM-DD"""
+    if len(value) == 8 and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:]}"
+    return value
+
+
+class GA4MetricsStore:
+    """Daily GA4 metrics keyed by (property_id, date)"""
+
+    def __init__(self, path: str, restatement_days: int = 3):
+        self.path = path
+        self.restatement_days = max(0, int(restatement_days))
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ga4_daily (
+                property_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                sessions INTEGER,
+                users INTEGER,
+                page_views INTEGER,
+                bounce_rate REAL,
+                avg_session_duration REAL,
+                conversions INTEGER,
+                fetched_at TEXT NOT NULL,
+                PRIMARY KEY (property_id, date)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['GA4MetricsStore']:
+        settings = config.get('metrics_store', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(settings.get('path', 'data/ga4_metrics.sqlite3'),
+                   restatement_days=settings.get('restatement_days', 3))
+
+    def last_date(self, property_id: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT MAX(date) FROM ga4_daily WHERE property_id = ?', (property_id,)
+            ).fetchone()
+        return row[0]
+
+    def fetch_start(self, property_id: str, window_start: datetime) -> datetime:
+        """First date that still needs fetching: after the last stored date, minus restatement"""
+        last = self.last_date(property_id)
+        if last is None:
+            return window_start
+        resume = datetime.strptime(last, '%Y-%m-%d') - timedelta(days=self.restatement_days - 1)
+        return max(window_start, resume)
+
+    def upsert(self, property_id: str, rows: List[Dict[str, Any]]):
+        fetched_at = datetime.now().isoformat()
+        values = [
+            (property_id, normalize_date(row['date']), *(row[c] for c in METRIC_COLUMNS), fetched_at)
+            for row in rows
+        ]
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO ga4_daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', values
+            )
+            self.conn.commit()
+
+    def rows(self, property_id: str, start: str, end: str) -> List[Dict[str, Any]]:
+        """Stored daily rows for an inclusive YYYY-MM-DD range, newest first"""
+        with self.lock:
+            cursor = self.conn.execute(
+                f"SELECT date, {', '.join(METRIC_COLUMNS)} FROM ga4_daily "
+                "WHERE property_id = ? AND date BETWEEN ? AND ? ORDER BY date DESC",
+                (property_id, start, end)
+            )
+            return [dict(zip(('date',) + METRIC_COLUMNS, row)) for row in cursor]
+
+    def totals(self, property_id: str, start: str, end: str) -> Optional[Dict[str, Any]]:
+        """Aggregate metrics over an inclusive date range, or None if nothing is stored"""
+        with self.lock:
+            row = self.conn.execute(
+                """SELECT COUNT(*), SUM(sessions), SUM(users), SUM(page_views),
+                          AVG(bounce_rate), SUM(conversions)
+                   FROM ga4_daily WHERE property_id = ? AND date BETWEEN ? AND ?""",
+                (property_id, start, end)
+            ).fetchone()
+        if not row[0]:
+            return None
+        return {
+            'total_sessions': row[1],
+            'total_users': row[2],
+            'total_page_views': row[3],
+            'avg_bounce_rate': row[4],
+            'total_conversions': row[5]
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
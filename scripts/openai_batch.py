@@ -0,0 +1,122 @@
+"""
+OpenAI Batch API client for bulk content generation
+Packs many chat completion requests into one JSONL batch job, polls it to
+completion and splits the output back out by custom_id
+"""
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Any, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class BatchJobError(Exception):
+    """Raised when a batch job fails, expires or is not finished in time"""
+
+
+class OpenAIBatchClient:
+    """Minimal client for the /files and /batches endpoints.
+
+    `send(method, url, **kwargs)` performs the HTTP call (the workflow passes
+    its rate-limited, retrying request method), so the client works against
+    any base_url, including a local stub server.
+    """
+
+    def __init__(self, send: Callable[..., requests.Response], base_url: str, api_key: str,
+                 poll_interval: float = 5.0, max_poll_interval: float = 60.0,
+                 max_wait: float = 24 * 3600, completion_window: str = '24h'):
+        self.send = send
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f'Bearer {api_key}'}
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.max_wait = max_wait
+        self.completion_window = completion_window
+
+    def submit(self, requests_by_id: Dict[str, Dict[str, Any]], endpoint: str = '/v1/chat/completions') -> str:
+        """Upload the request bodies as a JSONL file and create a batch; returns the batch id"""
+        lines = [
+            json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': endpoint, 'body': body})
+            for custom_id, body in requests_by_id.items()
+        ]
+        upload = self.send(
+            'POST', f"{self.base_url}/files",
+            headers=self.headers,
+            data={'purpose': 'batch'},
+            files={'file': ('batch.jsonl', '\n'.join(lines).encode('utf-8'), 'application/jsonl')}
+        )
+        upload.raise_for_status()
+        file_id = upload.json()['id']
+
+        created = self.send(
+            'POST', f"{self.base_url}/batches",
+            headers=self.headers,
+            json={'input_file_id': file_id, 'endpoint': endpoint, 'completion_window': self.completion_window}
+        )
+        created.raise_for_status()
+        batch_id = created.json()['id']
+        logger.info(f"Submitted OpenAI batch {batch_id} with {len(lines)} requests")
+        return batch_id
+
+    def wait(self, batch_id: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Poll until the batch reaches a terminal status, backing off between polls.
+
+        Gives up after max_wait seconds or at `deadline` (time.monotonic()),
+        whichever comes first, cancelling the batch so its results are not
+        paid for twice once the caller generates them another way.
+        """
+        started = time.monotonic()
+        deadline = min(started + self.max_wait, deadline if deadline is not None else float('inf'))
+        interval = self.poll_interval
+        while True:
+            response = self.send('GET', f"{self.base_url}/batches/{batch_id}", headers=self.headers)
+            response.raise_for_status()
+            batch = response.json()
+            if batch.get('status') in TERMINAL_STATUSES:
+                return batch
+            if time.monotonic() + interval > deadline:
+                self.cancel(batch_id)
+                raise BatchJobError(
+                    f"Batch {batch_id} still {batch.get('status')} after {time.monotonic() - started:.0f}s"
+                )
+            time.sleep(interval)
+            interval = min(self.max_poll_interval, interval * 1.5)
+
+    def cancel(self, batch_id: str):
+        try:
+            response = self.send('POST', f"{self.base_url}/batches/{batch_id}/cancel", headers=self.headers)
+            response.raise_for_status()
+        except Exception as e:  # the batch then simply expires in its completion window
+            logger.warning(f"Could not cancel batch {batch_id}: {e}")
+
+    def file_lines(self, file_id: Optional[str]) -> List[Dict[str, Any]]:
+        if not file_id:
+            return []
+        response = self.send('GET', f"{self.base_url}/files/{file_id}/content", headers=self.headers)
+        response.raise_for_status()
+        return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+    def run(self, requests_by_id: Dict[str, Dict[str, Any]], deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Submit, wait (until `deadline` at the latest) and return {custom_id: response body or BatchJobError}"""
+        batch_id = self.submit(requests_by_id)
+        batch = self.wait(batch_id, deadline)
+        if batch['status'] != 'completed':
+            raise BatchJobError(f"Batch {batch_id} ended with status {batch['status']}")
+
+        results: Dict[str, Any] = {}
+        for line in self.file_lines(batch.get('output_file_id')):
+            response = line.get('response') or {}
+            if response.get('status_code', 200) >= 400 or line.get('error'):
+                results[line['custom_id']] = BatchJobError(str(line.get('error') or response.get('body')))
+            else:
+                results[line['custom_id']] = response.get('body')
+        for line in self.file_lines(batch.get('error_file_id')):
+            results.setdefault(line['custom_id'], BatchJobError(str(line.get('error') or line.get('response'))))
+        for custom_id in requests_by_id:
+            results.setdefault(custom_id, BatchJobError(f"No result for {custom_id} in batch {batch_id}"))
+        return results
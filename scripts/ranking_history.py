@@ -0,0 +1,295 @@
+"""
+Array-backed keyword ranking history and vectorized drop detection
+Positions are stored per client as a day x keyword float32 matrix (NaN = not ranked)
+"""
+import json
+import math
+import os
+import threading
+import warnings
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:  # analytics fall back to pure Python over array('f')
+    np = None
+
+NAN = float('nan')
+
+
+class RankingHistory:
+    """Day x keyword position matrix for one client.
+
+    Rows are days starting at `start`, columns are keyword slots. The file
+    keeps spare columns (`width` >= len(keywords)) so new keywords rarely
+    force a rewrite, and a new day is a single row append.
+    """
+
+    def __init__(self, start: Optional[date] = None, keywords: Optional[List[str]] = None,
+                 width: int = 0, values: Optional[array] = None):
+        self.start = start
+        self.keywords = keywords or []
+        self.index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.width = width
+        self.values = values if values is not None else array('f')
+
+    @property
+    def days(self) -> int:
+        return len(self.values) // self.width if self.width else 0
+
+    @property
+    def end(self) -> Optional[date]:
+        return self.start + timedelta(days=self.days - 1) if self.days else None
+
+    def matrix(self):
+        """NumPy view of the history (days x keywords); requires numpy"""
+        m = np.frombuffer(self.values, dtype=np.float32).reshape(self.days, self.width)
+        return m[:, :len(self.keywords)]
+
+    def position(self, day_offset: int, column: int) -> float:
+        return self.values[day_offset * self.width + column]
+
+    # Analytics
+
+    def drops(self, threshold: float, baseline_days: int = 1) -> List[Dict[str, Any]]:
+        """Keywords whose latest position is at least `threshold` worse than the
+        mean of the preceding `baseline_days`. Keywords that stopped ranking
+        are reported with current=None."""
+        if self.days < 2 or not self.keywords:
+            return []
+        baseline_days = max(1, min(baseline_days, self.days - 1))
+
+        if np is not None:
+            m = self.matrix()
+            latest = m[-1]
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns
+                baseline = np.nanmean(m[-1 - baseline_days:-1], axis=0)
+            ranked_before = ~np.isnan(baseline)
+            lost = np.isnan(latest) & ranked_before
+            dropped = (latest - baseline >= threshold) | lost
+            columns = np.flatnonzero(dropped)
+            baselines = baseline[columns].tolist()
+            currents = latest[columns].tolist()
+        else:
+            columns, baselines, currents = [], [], []
+            last = self.days - 1
+            for column in range(len(self.keywords)):
+                history = [self.position(d, column) for d in range(last - baseline_days, last)]
+                history = [p for p in history if not math.isnan(p)]
+                if not history:
+                    continue
+                base = sum(history) / len(history)
+                current = self.position(last, column)
+                if math.isnan(current) or current - base >= threshold:
+                    columns.append(column)
+                    baselines.append(base)
+                    currents.append(current)
+
+        results = []
+        for column, base, current in zip(columns, baselines, currents):
+            lost = math.isnan(current)
+            results.append({
+                'keyword': self.keywords[column],
+                'baseline_position': round(base, 2),
+                'current_position': None if lost else int(current),
+                'change': None if lost else round(current - base, 2)
+            })
+        results.sort(key=lambda r: float('inf') if r['change'] is None else r['change'], reverse=True)
+        return results
+
+    def moving_average(self, window: int) -> Dict[str, float]:
+        """Mean position per keyword over the last `window` days (ranked days only)"""
+        if not self.days:
+            return {}
+        window = max(1, min(window, self.days))
+        if np is not None:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                averages = np.nanmean(self.matrix()[-window:], axis=0).tolist()
+        else:
+            averages = []
+            for column in range(len(self.keywords)):
+                ranked = [p for p in (self.position(d, column) for d in range(self.days - window, self.days))
+                          if not math.isnan(p)]
+                averages.append(sum(ranked) / len(ranked) if ranked else NAN)
+        return {k: round(a, 2) for k, a in zip(self.keywords, averages) if not math.isnan(a)}
+
+    def volatile(self, window: int, threshold: float) -> Dict[str, float]:
+        """Keywords whose position standard deviation over `window` days is >= threshold"""
+        if self.days < 2:
+            return {}
+        window = max(2, min(window, self.days))
+        if np is not None:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                spread = np.nanstd(self.matrix()[-window:], axis=0)
+            columns = np.flatnonzero(spread >= threshold)
+            return {self.keywords[c]: round(float(spread[c]), 2) for c in columns}
+
+        flagged = {}
+        for column in range(len(self.keywords)):
+            ranked = [p for p in (self.position(d, column) for d in range(self.days - window, self.days))
+                      if not math.isnan(p)]
+            if len(ranked) < 2:
+                continue
+            mean = sum(ranked) / len(ranked)
+            std = math.sqrt(sum((p - mean) ** 2 for p in ranked) / len(ranked))
+            if std >= threshold:
+                flagged[self.keywords[column]] = round(std, 2)
+        return flagged
+
+
+class RankingHistoryStore:
+    """One RankingHistory per client under `root`, as meta.json + positions.f32"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RankingHistoryStore':
+        settings = config.get('ranking_history', {}) or {}
+        return cls(settings.get('path', 'data/rankings'))
+
+    def _paths(self, client_id: str):
+        directory = os.path.join(self.root, client_id)
+        return directory, os.path.join(directory, 'meta.json'), os.path.join(directory, 'positions.f32')
+
+    def _client_lock(self, client_id: str) -> threading.Lock:
+        with self.lock:
+            return self.locks.setdefault(client_id, threading.Lock())
+
+    def _read_meta(self, client_id: str) -> Optional[Dict[str, Any]]:
+        _, meta_path, _ = self._paths(client_id)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+
+    def load(self, client_id: str, last_days: Optional[int] = None) -> RankingHistory:
+        """A client's history, or only its last `last_days` days (read from the end of the file)"""
+        meta = self._read_meta(client_id)
+        if meta is None:
+            return RankingHistory()
+        start = datetime.strptime(meta['start'], '%Y-%m-%d').date()
+        width = meta['width']
+        values = array('f')
+        if width:
+            _, _, data_path = self._paths(client_id)
+            row_bytes = width * values.itemsize
+            with open(data_path, 'rb') as f:
+                days = os.fstat(f.fileno()).st_size // row_bytes  # ignores a partially written trailing row
+                first = max(0, days - last_days) if last_days else 0
+                f.seek(first * row_bytes)
+                values.frombytes(f.read((days - first) * row_bytes))
+            start += timedelta(days=first)
+        return RankingHistory(start, meta['keywords'], width, values)
+
+    def record(self, client_id: str, day: date, rankings: Iterable[Any],
+               last_days: Optional[int] = None) -> RankingHistory:
+        """Store one day of rankings (position 0 = not ranked) and return the updated history.
+
+        Rankings are dicts or KeywordRanking rows and are read in a single
+        pass, so a streamed export is never held in memory. Only the day's
+        row is written (appended, or overwritten in place for a day already
+        stored); the positions file is rewritten only when new keywords
+        outgrow its spare columns. The returned history covers the last
+        `last_days` days when given.
+        """
+        with self._client_lock(client_id):
+            meta = self._read_meta(client_id)
+            if meta is None:
+                history = RankingHistory(day)
+            else:
+                history = RankingHistory(datetime.strptime(meta['start'], '%Y-%m-%d').date(),
+                                         meta['keywords'], meta['width'])
+                if day < history.start:
+                    raise ValueError(f"Cannot record {day} before history start {history.start}")
+            known = len(history.keywords)
+
+            columns, positions = array('L'), array('f')
+            for ranking in rankings:
+                if isinstance(ranking, dict):
+                    keyword, position = ranking['keyword'], ranking.get('position')
+                else:
+                    keyword, position = ranking.keyword, ranking.position
+                column = history.index.get(keyword)
+                if column is None:  # an export can list a keyword twice; it still gets one column
+                    column = history.index[keyword] = len(history.keywords)
+                    history.keywords.append(keyword)
+                if position:
+                    columns.append(column)
+                    positions.append(position)
+
+            width = max(history.width, len(history.keywords))
+            row = array('f', [NAN]) * width
+            for column, position in zip(columns, positions):
+                row[column] = position
+            offset = (day - history.start).days
+
+            if len(history.keywords) > history.width:
+                self._rewrite(client_id, history, offset, row)
+            elif history.width:
+                self._write_row(client_id, history.width, offset, row)
+
+            if meta is None or len(history.keywords) != known or history.width != meta['width']:
+                self._write_meta(client_id, history)
+            return self.load(client_id, last_days)
+
+    def _write_row(self, client_id: str, width: int, offset: int, row: array):
+        """Write one day's row at its offset, padding skipped days with NaN rows"""
+        directory, _, data_path = self._paths(client_id)
+        os.makedirs(directory, exist_ok=True)
+        row_bytes = width * row.itemsize
+        with open(data_path, 'r+b' if os.path.exists(data_path) else 'w+b') as f:
+            days = os.fstat(f.fileno()).st_size // row_bytes
+            if offset >= days:
+                f.truncate(days * row_bytes)  # drop a partially written trailing row
+                f.seek(days * row_bytes)
+                (array('f', [NAN]) * (width * (offset - days))).tofile(f)
+            else:
+                f.seek(offset * row_bytes)
+            row.tofile(f)
+
+    def _rewrite(self, client_id: str, history: RankingHistory, offset: int, row: array):
+        """Widen the stored matrix for new keywords and write it back with the day's row"""
+        stored = self.load(client_id) if history.width else RankingHistory(history.start)
+        history.values = stored.values
+        self._widen(history, len(history.keywords))
+        row.extend(array('f', [NAN]) * (history.width - len(row)))
+        if offset >= history.days:
+            history.values.extend(array('f', [NAN]) * (history.width * (offset - history.days)))
+            history.values.extend(row)
+        else:
+            history.values[offset * history.width:(offset + 1) * history.width] = row
+
+        directory, _, data_path = self._paths(client_id)
+        os.makedirs(directory, exist_ok=True)
+        tmp = data_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            history.values.tofile(f)
+        os.replace(tmp, data_path)
+
+    @staticmethod
+    def _widen(history: RankingHistory, needed: int):
+        width = max(needed, int(history.width * 1.5) + 16)
+        widened = array('f')
+        padding = array('f', [NAN]) * (width - history.width)
+        for d in range(history.days):
+            widened.extend(history.values[d * history.width:(d + 1) * history.width])
+            widened.extend(padding)
+        history.values = widened
+        history.width = width
+
+    def _write_meta(self, client_id: str, history: RankingHistory):
+        directory, meta_path, _ = self._paths(client_id)
+        os.makedirs(directory, exist_ok=True)
+        tmp = meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'start': history.start.isoformat(), 'width': history.width,
+                       'keywords': history.keywords}, f)
+        os.replace(tmp, meta_path)
@@ -0,0 +1,108 @@
+"""
+Per-host token-bucket rate limiting for outbound API calls
+Limits come from security.rate_limiting and optional apis.<provider>.rate_limit
+"""
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, requests_per_minute: float, burst_limit: int):
+        self.rate = max(float(requests_per_minute), 0.001) / 60.0
+        self.capacity = max(int(burst_limit), 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until a token is available; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.requests += 1
+                    if waited:
+                        self.throttled += 1
+                        self.wait_seconds += waited
+                        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'max_wait_seconds': round(self.max_wait_seconds, 3),
+                'requests_per_minute': self.rate * 60.0,
+                'burst_limit': self.capacity
+            }
+
+
+class RateLimiter:
+    """Registry of token buckets, one per (provider, host)"""
+
+    PROVIDERS = ('wordpress', 'google_business_profile', 'semrush', 'google_analytics_4', 'openai')
+
+    def __init__(self, config: Dict[str, Any]):
+        defaults = config.get('security', {}).get('rate_limiting', {}) or {}
+        self.default_rpm = defaults.get('requests_per_minute', 60)
+        self.default_burst = defaults.get('burst_limit', 100)
+
+        self.limits: Dict[str, Tuple[float, int]] = {}
+        apis = config.get('apis', {}) or {}
+        for provider in self.PROVIDERS:
+            override = (apis.get(provider) or {}).get('rate_limit', {}) or {}
+            self.limits[provider] = (
+                override.get('requests_per_minute', self.default_rpm),
+                override.get('burst_limit', self.default_burst)
+            )
+
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, provider: str, url: str) -> TokenBucket:
+        """Get (or lazily create) the bucket for the host behind url"""
+        key = (provider, urlparse(url).netloc)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get(key)
+                if bucket is None:
+                    rpm, burst = self.limits.get(provider, (self.default_rpm, self.default_burst))
+                    bucket = TokenBucket(rpm, burst)
+                    self.buckets[key] = bucket
+        return bucket
+
+    def acquire(self, provider: str, url: str) -> float:
+        """Wait for a token for this provider/host; returns seconds waited"""
+        return self.bucket(provider, url).acquire()
+
+    def stats(self, provider: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Per-host counters, including how long requests waited for a token"""
+        return {
+            f"{p}:{host}": bucket.stats()
+            for (p, host), bucket in list(self.buckets.items())
+            if provider is None or p == provider
+        }
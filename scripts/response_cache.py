@@ -0,0 +1,161 @@
+"""
+Persistent SQLite cache for API responses (SEMrush, GA4)
+Entries expire per endpoint TTL and are evicted least-recently-used by size.
+The total stored size is kept in a meta row maintained by triggers, so the
+byte budget is checked without scanning the table and stays correct when
+several worker processes share the file.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+# Request params that identify the caller rather than the data
+SECRET_PARAMS = {'key', 'access_token', 'api_key'}
+
+
+class ResponseCache:
+    """Provider/endpoint/params keyed cache of parsed API results"""
+
+    def __init__(self, path: str, ttl_seconds: Optional[Dict[str, int]] = None,
+                 default_ttl: int = 3600, max_size_mb: float = 256, refresh: bool = False):
+        self.path = path
+        self.ttl_seconds = ttl_seconds or {}
+        self.default_ttl = default_ttl
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.refresh = refresh
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires_at)')
+        self.conn.commit()
+        self._init_total_size()
+
+    def _init_total_size(self):
+        """Create the size-tracking meta row and triggers, seeding the row from existing entries once"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        self.conn.execute("""
+            INSERT OR IGNORE INTO cache_meta
+            SELECT 'total_size', COALESCE(SUM(size), 0) FROM responses
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN
+                UPDATE cache_meta SET value = value + new.size WHERE name = 'total_size';
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN
+                UPDATE cache_meta SET value = value - old.size WHERE name = 'total_size';
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN
+                UPDATE cache_meta SET value = value + new.size - old.size WHERE name = 'total_size';
+            END
+        """)
+        self.conn.commit()
+
+    def total_size(self) -> int:
+        return self.conn.execute("SELECT value FROM cache_meta WHERE name = 'total_size'").fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], refresh: bool = False) -> Optional['ResponseCache']:
+        settings = config.get('cache', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        return cls(
+            settings.get('path', '.cache/api_responses.sqlite3'),
+            ttl_seconds=settings.get('ttl_seconds'),
+            default_ttl=settings.get('default_ttl_seconds', 3600),
+            max_size_mb=settings.get('max_size_mb', 256),
+            refresh=refresh
+        )
+
+    @staticmethod
+    def make_key(provider: str, endpoint: str, params: Dict[str, Any]) -> str:
+        public = {k: v for k, v in params.items() if k not in SECRET_PARAMS}
+        raw = json.dumps([provider, endpoint, public], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def ttl(self, provider: str, endpoint: str) -> int:
+        return self.ttl_seconds.get(f"{provider}.{endpoint}", self.default_ttl)
+
+    def get(self, provider: str, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """Return the cached value if still fresh, else None"""
+        if self.refresh:
+            return None
+        key = self.make_key(provider, endpoint, params)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT value, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, provider: str, endpoint: str, params: Dict[str, Any], value: Any):
+        """Store a value and evict least-recently-used entries past max_size_mb"""
+        key = self.make_key(provider, endpoint, params)
+        payload = json.dumps(value, default=str)
+        now = time.time()
+        with self.lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete skips the size triggers
+            self.conn.execute("""
+                INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,
+                    expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+            """, (key, provider, endpoint, payload, len(payload), now + self.ttl(provider, endpoint), now))
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        self.conn.execute('DELETE FROM responses WHERE expires_at <= ?', (now,))
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany('DELETE FROM responses WHERE key = ?', stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries = self.conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'bytes': self.total_size()}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
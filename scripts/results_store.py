@@ -0,0 +1,334 @@
+"""
+Writes engine results into the dashboard's Prisma SQLite tables
+Keyword rankings, GA4 days, monthly summaries and published posts are
+upserted in one transaction per call with chunked executemany, over a small
+pool of connections. Tables are created by `npx prisma db push`; this module
+only writes rows in the format Prisma reads (cuid ids, DateTime as Unix ms).
+"""
+import logging
+import os
+import queue
+import random
+import sqlite3
+import string
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Any, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('Client', 'Keyword', 'Analytics', 'BlogPost')
+
+BASE36 = string.digits + string.ascii_lowercase
+
+KEYWORD_UPSERT = """
+    INSERT INTO "Keyword" ("id", "clientId", "keyword", "currentRank", "searchVolume", "difficulty",
+                           "lastCheckedAt", "createdAt", "updatedAt")
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT ("clientId", "keyword") DO UPDATE SET
+        "previousRank" = CASE WHEN "Keyword"."lastCheckedAt" >= ? THEN "Keyword"."previousRank"
+                              ELSE "Keyword"."currentRank" END,
+        "currentRank" = excluded."currentRank",
+        "searchVolume" = excluded."searchVolume",
+        "difficulty" = excluded."difficulty",
+        "lastCheckedAt" = excluded."lastCheckedAt",
+        "updatedAt" = excluded."updatedAt"
+"""
+
+ANALYTICS_UPSERT = """
+    INSERT INTO "Analytics" ("id", "clientId", "date", "sessions", "users", "pageViews", "bounceRate",
+                             "avgSessionDuration", "conversions", "createdAt", "updatedAt")
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT ("clientId", "date") DO UPDATE SET
+        "sessions" = excluded."sessions",
+        "users" = excluded."users",
+        "pageViews" = excluded."pageViews",
+        "bounceRate" = excluded."bounceRate",
+        "avgSessionDuration" = excluded."avgSessionDuration",
+        "conversions" = excluded."conversions",
+        "updatedAt" = excluded."updatedAt"
+"""
+
+SUMMARY_UPSERT = """
+    INSERT INTO "Analytics" ("id", "clientId", "date", "organicTraffic", "keywordRankings", "createdAt", "updatedAt")
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT ("clientId", "date") DO UPDATE SET
+        "organicTraffic" = excluded."organicTraffic",
+        "keywordRankings" = excluded."keywordRankings",
+        "updatedAt" = excluded."updatedAt"
+"""
+
+# A WordPress post id seen before is the same post being re-published (a retried job)
+BLOG_POST_UPSERT = """
+    INSERT INTO "BlogPost" ("id", "clientId", "title", "metaDescription", "content", "schemaJson", "service",
+                            "location", "wordpressPostId", "wordpressUrl", "publishedAt", "createdAt", "updatedAt")
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT ("wordpressPostId") DO UPDATE SET
+        "title" = excluded."title",
+        "metaDescription" = excluded."metaDescription",
+        "content" = excluded."content",
+        "schemaJson" = excluded."schemaJson",
+        "wordpressUrl" = excluded."wordpressUrl",
+        "publishedAt" = excluded."publishedAt",
+        "updatedAt" = excluded."updatedAt"
+    WHERE "BlogPost"."clientId" = excluded."clientId"
+"""
+
+_counter = random.randrange(36 ** 4)
+_counter_lock = threading.Lock()
+_fingerprint = ''.join(random.choice(BASE36) for _ in range(4))
+
+
+def to_base36(value: int, width: int) -> str:
+    digits = []
+    while value:
+        value, digit = divmod(value, 36)
+        digits.append(BASE36[digit])
+    return ''.join(reversed(digits)).rjust(width, '0')[-width:]
+
+
+def new_id() -> str:
+    """25-character collision-resistant id in Prisma's cuid() format"""
+    global _counter
+    with _counter_lock:
+        _counter = (_counter + 1) % 36 ** 4
+        count = _counter
+    return ('c' + to_base36(int(time.time() * 1000), 8) + to_base36(count, 4) + _fingerprint
+            + ''.join(random.choice(BASE36) for _ in range(8)))
+
+
+def epoch_ms(moment: datetime) -> int:
+    """Prisma's SQLite encoding of DateTime"""
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return int(moment.timestamp() * 1000)
+
+
+def day_ms(day: Any) -> int:
+    """UTC midnight of a date, date string (YYYY-MM-DD or GA4's YYYYMMDD) or datetime, as Unix ms"""
+    if isinstance(day, str):
+        day = datetime.strptime(day.replace('-', ''), '%Y%m%d').date()
+    elif isinstance(day, datetime):
+        day = day.date()
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def prisma_sqlite_path(url: str, schema_path: str = 'prisma/schema.prisma') -> str:
+    """File path of a Prisma `file:` URL; relative paths resolve against the schema's directory"""
+    path = url[len('file:'):] if url.startswith('file:') else url
+    path = path.split('?', 1)[0]
+    if path.startswith('//'):
+        path = path[2:]
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(schema_path), path)
+    return os.path.normpath(path)
+
+
+def chunks(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections handed out to worker threads"""
+
+    def __init__(self, path: str, size: int = 4, busy_timeout: float = 30.0):
+        self.path = path
+        self.size = max(1, size)
+        self.busy_timeout = busy_timeout
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')  # the dashboard keeps reading while the engine writes
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')  # as Prisma does; rows for unknown clients fail loudly
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+            if create:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            else:
+                conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            self.idle.put(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue on busy_timeout"""
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ResultsStore:
+    """Upserts engine results into the Prisma Keyword, Analytics and BlogPost tables.
+
+    Config client ids map to Client.id values in the database through
+    clients.<id>.database_id, looked up per client so the lazily decoded
+    client index is not decoded in full; unmapped clients use their config id.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, batch_size: int = 500,
+                 clients: Optional[Mapping[str, Any]] = None):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.clients = clients if clients is not None else {}
+        self.pool = ConnectionPool(path, pool_size)
+        self.written: Dict[str, int] = {table: 0 for table in TABLES[1:]}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ResultsStore']:
+        settings = config.get('database', {}) or {}
+        if not settings.get('enabled', True):
+            return None
+        url = settings.get('connection_string')
+        if settings.get('type', 'sqlite') != 'sqlite':
+            logger.warning(f"Result persistence only supports sqlite databases, not {settings.get('type')}")
+            return None
+        if not url:
+            logger.info("No database connection_string (DATABASE_URL), results are not persisted")
+            return None
+
+        path = prisma_sqlite_path(url, settings.get('schema_path', 'prisma/schema.prisma'))
+        if not os.path.exists(path):
+            logger.warning(f"Database {path} does not exist (run `npx prisma db push`), results are not persisted")
+            return None
+        store = cls(
+            path,
+            pool_size=settings.get('pool_size', 4),
+            batch_size=settings.get('batch_size', 500),
+            clients=config.get('clients')
+        )
+        missing = store.missing_tables()
+        if missing:
+            logger.warning(f"Database {path} has no {', '.join(missing)} tables (run `npx prisma db push`), "
+                           "results are not persisted")
+            store.close()
+            return None
+        return store
+
+    def missing_tables(self) -> List[str]:
+        with self.pool.connection() as conn:
+            present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return [table for table in TABLES if table not in present]
+
+    def database_id(self, client_id: str) -> str:
+        client = self.clients.get(client_id) or {}
+        return client.get('database_id') or client_id
+
+    def write(self, table: str, sql: str, rows: List[Tuple[Any, ...]]) -> int:
+        """Run one upsert statement over rows in a single transaction; returns rows changed"""
+        if not rows:
+            return 0
+        with self.pool.transaction() as conn:
+            before = conn.total_changes
+            for chunk in chunks(rows, self.batch_size):
+                conn.executemany(sql, chunk)
+            changed = conn.total_changes - before
+        with self.lock:
+            self.written[table] += changed
+        return changed
+
+    def save_rankings(self, client_id: str, rankings: List[Dict[str, Any]],
+                      checked_at: Optional[datetime] = None) -> int:
+        """Upsert one day's SEMrush rankings on (client, keyword).
+
+        The first check of a new day moves currentRank into previousRank;
+        re-running the check the same day only refreshes currentRank.
+        Keywords missing from the export keep their last known rank.
+        """
+        checked_at = checked_at or datetime.now()
+        now, checked = epoch_ms(datetime.now()), epoch_ms(checked_at)
+        day_start = epoch_ms(checked_at.replace(hour=0, minute=0, second=0, microsecond=0))
+        db_client = self.database_id(client_id)
+        rows = [
+            (new_id(), db_client, ranking['keyword'], ranking.get('position'), ranking.get('search_volume'),
+             None if ranking.get('difficulty') is None else int(round(ranking['difficulty'])),
+             checked, now, now, day_start)
+            for ranking in rankings
+        ]
+        return self.write('Keyword', KEYWORD_UPSERT, rows)
+
+    def save_analytics(self, client_id: str, days: List[Dict[str, Any]]) -> int:
+        """Upsert daily GA4 rows on (client, date)"""
+        now = epoch_ms(datetime.now())
+        db_client = self.database_id(client_id)
+        rows = [
+            (new_id(), db_client, day_ms(day['date']), day.get('sessions'), day.get('users'),
+             day.get('page_views'), day.get('bounce_rate'), day.get('avg_session_duration'),
+             day.get('conversions'), now, now)
+            for day in days
+        ]
+        return self.write('Analytics', ANALYTICS_UPSERT, rows)
+
+    def save_report_summary(self, client_id: str, report: Dict[str, Any], day: Optional[date] = None) -> int:
+        """Record a monthly report's sessions and ranked keyword count on the report day's Analytics row"""
+        now = epoch_ms(datetime.now())
+        ga4 = report.get('ga4_analytics') or {}
+        row = (new_id(), self.database_id(client_id), day_ms(day or date.today()),
+               ga4.get('total_sessions'), len(report.get('keyword_rankings') or []), now, now)
+        return self.write('Analytics', SUMMARY_UPSERT, [row])
+
+    def save_blog_post(self, client_id: str, content: Dict[str, Any], upload: Dict[str, Any],
+                       wordpress: Dict[str, Any]) -> int:
+        """Insert a generated post, or update it when its WordPress post id was stored before.
+
+        Posts without a WordPress id are not stored: the id is the upsert key,
+        and a NULL key would insert a duplicate row on every retry.
+        """
+        post_id = wordpress.get('id')
+        if post_id is None:
+            logger.debug(f"Post '{content['title']}' for {client_id} has no WordPress id, not stored")
+            return 0
+        now = epoch_ms(datetime.now())
+        published = wordpress.get('date')
+        row = (
+            new_id(), self.database_id(client_id), content['title'], content.get('metaDescription'),
+            content['content'], content.get('schemaJson'), upload.get('service'), upload.get('location'),
+            str(post_id), wordpress.get('link'),
+            epoch_ms(datetime.fromisoformat(published)) if published else None, now, now
+        )
+        changed = self.write('BlogPost', BLOG_POST_UPSERT, [row])
+        if not changed:
+            logger.warning(f"WordPress post {post_id} is already stored for another client, not saved for {client_id}")
+        return changed
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.written)
+
+    def close(self):
+        self.pool.close()
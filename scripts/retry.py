@@ -0,0 +1,129 @@
+"""
+Retry policy with exponential backoff and full jitter
+Driven by error_handling.max_retries / retry_delay_seconds
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Iterator, Optional
+
+import requests
+
+# Statuses worth retrying for any request
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Statuses that mean the server rejected the request without acting on it,
+# so even non-idempotent calls (WordPress/GBP posts) can be retried safely
+REJECTED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+class RetryLater(Exception):
+    """A retryable failure whose backoff is too long to wait for inline.
+
+    Raised instead of sleeping in a worker thread; the caller re-queues the
+    whole job after `delay` seconds, resuming with `attempt` retries spent.
+    """
+
+    def __init__(self, message: str, delay: float, attempt: int = 0):
+        super().__init__(message)
+        self.delay = delay
+        self.attempt = attempt
+
+
+class RetryBudget:
+    """Retries a job has left across its deferred re-runs and queue attempts.
+
+    Callers that re-run a job after RetryLater activate a budget starting at
+    the exception's `attempt`, so requests resume counting from there instead
+    of getting a fresh max_retries each time. `exhausted` is set when a
+    request gave up on a retryable failure; re-running the job cannot help.
+    """
+
+    def __init__(self, spent: int = 0):
+        self.spent = spent
+        self.exhausted = False
+
+    @contextmanager
+    def active(self) -> Iterator['RetryBudget']:
+        token = _budget.set(self)
+        try:
+            yield self
+        finally:
+            _budget.reset(token)
+
+
+# Copied into workflow step threads with contextvars.copy_context()
+_budget: ContextVar[Optional[RetryBudget]] = ContextVar('retry_budget', default=None)
+
+
+def current_budget() -> Optional[RetryBudget]:
+    return _budget.get()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """Decides whether and how long to back off between attempts"""
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 60.0, inline_max_delay: float = 5.0):
+        self.max_retries = max(0, int(max_retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.inline_max_delay = inline_max_delay
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RetryPolicy':
+        settings = config.get('error_handling', {}) or {}
+        return cls(
+            max_retries=settings.get('max_retries', 3),
+            base_delay=settings.get('retry_base_delay_seconds', 1.0),
+            max_delay=settings.get('retry_delay_seconds', 60),
+            inline_max_delay=settings.get('inline_retry_max_seconds', 5.0)
+        )
+
+    def is_retryable_response(self, response: requests.Response, idempotent: bool) -> bool:
+        statuses = RETRYABLE_STATUSES if idempotent else REJECTED_STATUSES
+        return response.status_code in statuses
+
+    def is_retryable_exception(self, error: Exception, idempotent: bool) -> bool:
+        # Connect timeouts never reached the server; read timeouts and dropped
+        # connections may have, so only retry those when the call is idempotent
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if isinstance(error, (requests.ConnectionError, requests.Timeout,
+                              requests.exceptions.ChunkedEncodingError)):
+            return idempotent
+        return False
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (1-based), full jitter unless Retry-After is given"""
+        if retry_after is not None:
+            return retry_after
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def wait(self, attempt: int, retry_after: Optional[float], reason: str):
+        """Sleep inline for short backoffs, otherwise raise RetryLater"""
+        delay = self.backoff(attempt, retry_after)
+        if delay > self.inline_max_delay:
+            raise RetryLater(reason, delay, attempt)
+        time.sleep(delay)
@@ -0,0 +1,229 @@
+"""
+Cron-driven job scheduler
+Sleeps until the next deadline instead of polling, runs jobs on a worker
+pool so a slow job never delays another, and persists each job's last run
+so deadlines missed while the process was down are caught up on restart.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (name, low, high) for the five cron fields
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+
+def parse_cron_field(text: str, name: str, low: int, high: int) -> FrozenSet[int]:
+    """Parse one cron field: *, n, a-b, lists and /step"""
+    values = set()
+    for part in text.split(','):
+        spec, _, step = part.partition('/')
+        if spec == '*':
+            start, end = low, high
+        elif '-' in spec:
+            start, end = (int(v) for v in spec.split('-', 1))
+        else:
+            start = end = int(spec)
+        if step:
+            if int(step) < 1:
+                raise ValueError(f"Invalid step in cron {name} field: {part}")
+            if spec != '*' and '-' not in spec:
+                end = high
+        if not low <= start <= end <= high:
+            raise ValueError(f"Cron {name} field out of range {low}-{high}: {part}")
+        values.update(range(start, end + 1, int(step or 1)))
+    return frozenset(values)
+
+
+class CronExpression:
+    """Standard five-field cron expression (minute hour day month weekday), local time"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expression}'")
+        self.expression = expression
+        parsed = [parse_cron_field(text, *spec) for text, spec in zip(fields, CRON_FIELDS)]
+        self.minutes = tuple(sorted(parsed[0]))
+        self.hours = tuple(sorted(parsed[1]))
+        self.days = parsed[2]
+        self.months = parsed[3]
+        self.weekdays = frozenset(d % 7 for d in parsed[4])  # 0 and 7 are both Sunday
+        # As in cron, when both day fields are restricted a date matching either runs
+        self.either_day = fields[2] != '*' and fields[4] != '*'
+
+    def day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        return (day or weekday) if self.either_day else (day and weekday)
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self.day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = next((h for h in self.hours if h >= moment.hour), None)
+            if hour is None:
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != moment.hour:
+                moment = moment.replace(hour=hour, minute=0)
+            minute = next((m for m in self.minutes if m >= moment.minute), None)
+            if minute is None:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=minute)
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+    def __repr__(self) -> str:
+        return f"CronExpression('{self.expression}')"
+
+
+def spread(key: str, window: float) -> float:
+    """Stable offset in [0, window) for key, so each client keeps its slot across runs"""
+    if window <= 0:
+        return 0.0
+    return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) / 0x100000000 * window
+
+
+class ScheduledJob:
+    """A named cron job; func receives the deadline it is running for"""
+
+    __slots__ = ('name', 'cron', 'func')
+
+    def __init__(self, name: str, cron: str, func: Callable[[datetime], Any]):
+        self.name = name
+        self.cron = CronExpression(cron)
+        self.func = func
+
+
+class Scheduler:
+    """Runs ScheduledJobs at their cron deadlines on a thread pool.
+
+    A job whose previous run is still going when its next deadline arrives
+    skips that deadline. With catch_up, a job whose persisted last run is
+    older than its most recent deadline runs once immediately on start.
+    """
+
+    def __init__(self, jobs: List[ScheduledJob], state_path: Optional[str] = None,
+                 max_workers: int = 3, catch_up: bool = True, max_sleep: float = 3600):
+        self.jobs = {job.name: job for job in jobs}
+        self.state_path = state_path
+        self.max_workers = max(1, max_workers)
+        self.catch_up = catch_up
+        self.max_sleep = max_sleep  # re-check the wall clock at least this often
+        self.state: Dict[str, Dict[str, Any]] = self.load_state()
+        self.running: set = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scheduler state {self.state_path}: {e}")
+            return {}
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def first_due(self, job: ScheduledJob, now: datetime) -> datetime:
+        last_run = self.state.get(job.name, {}).get('last_run')
+        if last_run and self.catch_up:
+            missed = job.cron.next_after(datetime.fromisoformat(last_run))
+            if missed <= now:
+                # Several missed deadlines collapse into one run for the latest of them
+                while (following := job.cron.next_after(missed)) <= now:
+                    missed = following
+                logger.info(f"Catching up {job.name}: missed run due {missed.isoformat()}")
+                return missed
+        return job.cron.next_after(now)
+
+    def schedule(self, now: Optional[datetime] = None) -> List[Tuple[datetime, str]]:
+        """Next deadline of every job, soonest first"""
+        now = now or datetime.now()
+        return sorted((self.first_due(job, now), job.name) for job in self.jobs.values())
+
+    def run_forever(self):
+        """Dispatch jobs until stop() is called (or KeyboardInterrupt)"""
+        heap = self.schedule()
+        heapq.heapify(heap)
+        for due, name in heap:
+            logger.info(f"Scheduled {name} ({self.jobs[name].cron.expression}), next run {due.isoformat()}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler') as executor:
+            try:
+                while heap and not self.stopped.is_set():
+                    due, name = heap[0]
+                    delay = (due - datetime.now()).total_seconds()
+                    if delay > 0:
+                        self.stopped.wait(min(delay, self.max_sleep))
+                        continue
+                    heapq.heappop(heap)
+                    self.dispatch(executor, self.jobs[name], due)
+                    heapq.heappush(heap, (self.jobs[name].cron.next_after(max(due, datetime.now())), name))
+            except KeyboardInterrupt:
+                logger.info("Scheduler interrupted, waiting for running jobs")
+            finally:
+                self.stopped.set()
+
+    def stop(self):
+        self.stopped.set()
+
+    def dispatch(self, executor: ThreadPoolExecutor, job: ScheduledJob, due: datetime):
+        with self.lock:
+            if job.name in self.running:
+                logger.warning(f"{job.name} is still running, skipping the run due {due.isoformat()}")
+                return
+            self.running.add(job.name)
+        executor.submit(self.run_job, job, due)
+
+    def run_job(self, job: ScheduledJob, due: datetime):
+        started = time.perf_counter()
+        success = False
+        try:
+            logger.info(f"Starting {job.name} (due {due.isoformat()})")
+            job.func(due)
+            success = True
+        except Exception as e:
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            duration = time.perf_counter() - started
+            with self.lock:
+                self.running.discard(job.name)
+                self.state[job.name] = {
+                    'last_run': due.isoformat(),
+                    'finished': datetime.now().isoformat(),
+                    'success': success,
+                    'duration': round(duration, 3)
+                }
+                try:
+                    self.save_state()
+                except OSError as e:
+                    logger.error(f"Could not persist scheduler state: {e}")
+            logger.info(f"Finished {job.name} in {duration:.1f}s")
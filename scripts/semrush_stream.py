@@ -0,0 +1,95 @@
+"""
+Streaming parser for SEMrush domain_organic exports
+Rows are parsed lazily from the response body and fetched page by page
+"""
+from typing import Callable, Dict, Any, Iterable, Iterator, List, NamedTuple, Optional
+
+import requests
+
+
+class KeywordRanking(NamedTuple):
+    """One domain_organic row (export_columns Ph,Po,Nq,Kd,Cp)"""
+    keyword: str
+    position: int
+    search_volume: int
+    difficulty: int
+    cpc: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def parse_domain_organic(lines: Iterable[str]) -> Iterator[KeywordRanking]:
+    """Parse pipe separated export lines, skipping the header row"""
+    lines = iter(lines)
+    for header in lines:
+        if not header.strip():
+            continue
+        if header.startswith('ERROR 50 '):  # NOTHING FOUND
+            return
+        if header.startswith('ERROR'):
+            raise ValueError(f"SEMrush error: {header.strip()}")
+        break
+
+    for line in lines:
+        if not line.strip():
+            continue
+        parts = line.split('|')
+        if len(parts) >= 5:
+            yield KeywordRanking(
+                parts[0],
+                int(parts[1]) if parts[1] else 0,
+                int(parts[2]) if parts[2] else 0,
+                int(parts[3]) if parts[3] else 0,
+                float(parts[4]) if parts[4] else 0
+            )
+
+
+def _counted_lines(response: requests.Response, read: List[int], chunk_size: int = 65536) -> Iterator[str]:
+    """Decoded body lines, adding the body bytes consumed so far to read[0]"""
+    pending = b''
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        read[0] += len(chunk)
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip(b'\r').decode(response.encoding, errors='replace')
+    if pending:
+        yield pending.rstrip(b'\r').decode(response.encoding, errors='replace')
+
+
+def iter_domain_organic(send: Callable[..., requests.Response], url: str, params: Dict[str, Any],
+                        page_size: int = 10000, limit: Optional[int] = None,
+                        on_page_read: Optional[Callable[[int], None]] = None) -> Iterator[KeywordRanking]:
+    """Yield rankings across display_offset pages, stopping early after `limit` rows.
+
+    `send` is called as send(url, params=...) and must return a streamed
+    response; each page is closed before the next one is requested, after
+    on_page_read(body bytes read) is called for it.
+    """
+    offset = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_limit = page_size if remaining is None else min(page_size, remaining)
+        page_params = dict(params, display_limit=page_limit, display_offset=offset)
+
+        response = send(url, params=page_params)
+        try:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            count = 0
+            read = [0]
+            for ranking in parse_domain_organic(_counted_lines(response, read)):
+                yield ranking
+                count += 1
+        finally:
+            if on_page_read is not None:
+                on_page_read(read[0])
+            response.close()
+
+        if count < page_limit:
+            return
+        offset += count
+        if remaining is not None:
+            remaining -= count
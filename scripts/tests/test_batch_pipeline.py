@@ -0,0 +1,56 @@
+"""
+Batch pipeline deferral: a rate-limited item must not hold up its stage
+Run with: python -m pytest scripts/tests
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_pipeline import BatchPipeline  # noqa: E402
+from retry import RetryLater  # noqa: E402
+from workflow_engine import WorkflowEngine  # noqa: E402
+
+
+def run_batch(generate, records, max_deferrals=3):
+    engine = WorkflowEngine(
+        {'content_creation': {'steps': [{'name': 'generate', 'type': 'generate', 'output': ['content']}]}},
+        {'generate': generate}
+    )
+    pipeline = BatchPipeline(
+        engine, 'content_creation', make_context=lambda record: dict(record),
+        finalize=lambda context, timings: {'success': True, 'content': context['content']},
+        stage_workers=1, max_deferrals=max_deferrals
+    )
+    results = []
+    stats = pipeline.run(iter(records), results.append)
+    return results, stats
+
+
+def test_deferred_item_does_not_block_the_stage():
+    calls = {}
+
+    def generate(step, inputs, context):
+        calls[context['n']] = calls.get(context['n'], 0) + 1
+        if context['n'] == 0 and calls[0] == 1:
+            raise RetryLater('rate limited', 0.5, attempt=2)
+        return {'content': f"post {context['n']}"}
+
+    started = time.perf_counter()
+    results, stats = run_batch(generate, [{'n': n} for n in range(5)])
+
+    assert stats['processed'] == 5 and stats['failed'] == 0
+    assert [r['index'] for r in results][-1] == 0  # the others finished while record 0 waited
+    assert calls[0] == 2
+    assert time.perf_counter() - started < 1.5
+
+
+def test_item_fails_after_max_deferrals():
+    def generate(step, inputs, context):
+        raise RetryLater('rate limited', 0.01)
+
+    results, stats = run_batch(generate, [{'n': 0}], max_deferrals=2)
+
+    assert stats['failed'] == 1
+    assert results[0]['error'].startswith('generate: rate limited')
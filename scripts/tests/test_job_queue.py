@@ -0,0 +1,61 @@
+"""
+Job failure classification and the worker's permanent-failure path
+Run with: python -m pytest scripts/tests
+"""
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobWorker, SQLiteJobQueue, is_permanent_error  # noqa: E402
+from retry import RetryLater  # noqa: E402
+from workflow_engine import WorkflowEngine, WorkflowError  # noqa: E402
+
+
+def http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} Client Error", response=response)
+
+
+def wrapped(error: Exception) -> WorkflowError:
+    try:
+        raise WorkflowError(f"Workflow upload_processing failed: {error}") from error
+    except WorkflowError as e:
+        return e
+
+
+@pytest.mark.parametrize('error, permanent', [
+    (http_error(401), True),
+    (http_error(404), True),
+    (http_error(429), False),
+    (http_error(503), False),
+    (KeyError('client_404'), True),
+    (requests.ConnectionError('reset'), False),
+    (RetryLater('rate limited', 30), False),
+])
+def test_wrapped_errors_are_classified_by_their_cause(error, permanent):
+    assert is_permanent_error(error) is permanent
+    assert is_permanent_error(wrapped(error)) is permanent
+
+
+def test_workflow_step_4xx_fails_job_on_first_attempt(tmp_path):
+    def forbidden(step, inputs, context):
+        raise http_error(403)
+
+    engine = WorkflowEngine({'upload': {'steps': [{'name': 'publish', 'type': 'wordpress_post'}]}},
+                            {'wordpress_post': forbidden})
+    queue = SQLiteJobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=5)
+    job_id, _ = queue.enqueue('upload', {'client_id': 'client_001'})
+    worker = JobWorker(queue, {'upload': lambda payload: engine.run('upload', dict(payload))})
+
+    assert worker.run_one()
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 1
+    assert 'WorkflowError' in job['error']
+    assert worker.failed == 1
+    queue.close()
@@ -0,0 +1,57 @@
+"""
+Ranking history appends: one row per day, no full rewrite, tail loads
+Run with: python -m pytest scripts/tests
+"""
+import math
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking_history import RankingHistoryStore  # noqa: E402
+
+START = date(2026, 1, 1)
+
+
+def rankings(positions):
+    return [{'keyword': keyword, 'position': position} for keyword, position in positions.items()]
+
+
+def test_daily_record_appends_one_row_in_place(tmp_path):
+    store = RankingHistoryStore(str(tmp_path))
+    store.record('client_001', START, rankings({'a': 3, 'b': 7}))
+    data_path = os.path.join(str(tmp_path), 'client_001', 'positions.f32')
+    inode = os.stat(data_path).st_ino
+
+    for offset in range(1, 5):
+        store.record('client_001', START + timedelta(days=offset), rankings({'a': 3 + offset, 'b': 7}))
+
+    history = store.load('client_001')
+    assert os.stat(data_path).st_ino == inode  # appended, never replaced
+    assert os.path.getsize(data_path) == history.days * history.width * 4
+    assert [history.position(d, 0) for d in range(history.days)] == [3, 4, 5, 6, 7]
+
+
+def test_new_keywords_widen_and_gaps_are_unranked(tmp_path):
+    store = RankingHistoryStore(str(tmp_path))
+    store.record('client_001', START, rankings({'a': 3}))
+    wide = {f"k{n}": n + 1 for n in range(40)}
+    history = store.record('client_001', START + timedelta(days=2), rankings(wide))
+
+    assert history.keywords[0] == 'a' and len(history.keywords) == 41
+    assert history.width >= 41
+    assert math.isnan(history.position(1, 0))  # the skipped day
+    assert history.position(0, 0) == 3
+    assert history.position(2, history.index['k39']) == 40
+
+
+def test_record_returns_only_the_requested_tail(tmp_path):
+    store = RankingHistoryStore(str(tmp_path))
+    for offset in range(10):
+        history = store.record('client_001', START + timedelta(days=offset), rankings({'a': offset + 1}), last_days=3)
+
+    assert history.days == 3
+    assert history.start == START + timedelta(days=7)
+    assert [history.position(d, 0) for d in range(3)] == [8, 9, 10]
+    assert history.drops(threshold=1, baseline_days=2) == store.load('client_001').drops(threshold=1, baseline_days=2)
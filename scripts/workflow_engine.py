@@ -0,0 +1,217 @@
+"""
+Executor for the step workflows declared under `workflows:` in workflow.yaml
+Steps are compiled into a dependency graph from their input/output names and
+independent steps run concurrently
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Input name that makes a step depend on every step declared before it
+ALL_PREVIOUS = 'all_previous_outputs'
+
+# handler(step, inputs, context) -> outputs merged into the context
+StepHandler = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+class WorkflowError(Exception):
+    """Raised when a workflow cannot be compiled or one of its steps fails"""
+
+
+@dataclass
+class CompiledStep:
+    """A workflow step with its resolved dependencies"""
+    name: str
+    type: str
+    definition: Dict[str, Any]
+    inputs: List[str]
+    outputs: List[str]
+    depends_on: Set[str]
+    condition: Optional[str] = None
+
+
+@dataclass
+class WorkflowRun:
+    """Outputs and per-step status/timing of one workflow execution"""
+    workflow: str
+    context: Dict[str, Any]
+    status: Dict[str, str] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+
+def evaluate_condition(condition: Optional[str], context: Dict[str, Any]) -> bool:
+    """Truthiness of a dotted context path, e.g. 'ranking_changes.significant_drop'.
+
+    A leading 'not ' negates the result; a missing path is false.
+    """
+    if not condition:
+        return True
+    expression = condition.strip()
+    negate = expression.startswith('not ')
+    if negate:
+        expression = expression[4:].strip()
+
+    value: Any = context
+    for part in expression.split('.'):
+        if isinstance(value, dict):
+            value = value.get(part)
+        else:
+            value = getattr(value, part, None)
+        if value is None:
+            break
+    return not value if negate else bool(value)
+
+
+class WorkflowEngine:
+    """Compiles workflow definitions into DAGs and runs them with a thread pool"""
+
+    def __init__(self, definitions: Dict[str, Any], handlers: Dict[str, StepHandler], max_workers: int = 4,
+                 observer: Optional[Callable[['CompiledStep', Dict[str, Any], float, Optional[BaseException]], None]] = None):
+        self.definitions = definitions or {}
+        self.handlers = handlers
+        self.max_workers = max_workers
+        self.observer = observer  # observer(step, context, seconds, error) after every step
+        self.plans: Dict[str, List[CompiledStep]] = {}
+
+    def compile(self, name: str) -> List[CompiledStep]:
+        """Resolve step dependencies for a workflow; cached after the first call"""
+        if name in self.plans:
+            return self.plans[name]
+        if name not in self.definitions:
+            raise WorkflowError(f"Unknown workflow: {name}")
+
+        steps = self.definitions[name].get('steps', []) or []
+        producers: Dict[str, str] = {}
+        for step in steps:
+            if step.get('type') not in self.handlers:
+                raise WorkflowError(f"No handler for step type '{step.get('type')}' in {name}.{step.get('name')}")
+            for output in step.get('output', []) or []:
+                producers[output] = step['name']
+
+        plan = []
+        for position, step in enumerate(steps):
+            inputs = list(step.get('input', []) or [])
+            depends_on = set()
+            for input_name in inputs:
+                if input_name == ALL_PREVIOUS:
+                    depends_on.update(s['name'] for s in steps[:position])
+                elif input_name in producers and producers[input_name] != step['name']:
+                    depends_on.add(producers[input_name])
+            plan.append(CompiledStep(
+                name=step['name'],
+                type=step['type'],
+                definition=step,
+                inputs=inputs,
+                outputs=list(step.get('output', []) or []),
+                depends_on=depends_on,
+                condition=step.get('condition')
+            ))
+
+        self._topological(name, plan)  # rejects cycles
+        self.plans[name] = plan
+        return plan
+
+    @staticmethod
+    def _topological(name: str, plan: List[CompiledStep]) -> List[CompiledStep]:
+        by_name = {step.name: step for step in plan}
+        remaining = {step.name: set(step.depends_on) for step in plan}
+        ordered = []
+        while remaining:
+            ready = [n for n, deps in remaining.items() if not deps]
+            if not ready:
+                raise WorkflowError(f"Workflow {name} has a dependency cycle between: {', '.join(sorted(remaining))}")
+            for n in ready:
+                del remaining[n]
+                ordered.append(by_name[n])
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return ordered
+
+    def stages(self, name: str) -> List[CompiledStep]:
+        """Steps of a workflow in an order that respects dependencies (for pipelining)"""
+        return self._topological(name, self.compile(name))
+
+    def run(self, name: str, context: Dict[str, Any]) -> WorkflowRun:
+        """Execute a workflow, running every step whose dependencies are done.
+
+        Skipped steps (false condition) count as done; their outputs are
+        simply absent from the context. The first failing step stops new
+        steps from starting and raises WorkflowError once running ones finish.
+        A failure carrying a `.delay` (RetryLater) is re-raised unwrapped so
+        the caller can defer the whole run instead of failing it.
+        """
+        plan = self.compile(name)
+        run = WorkflowRun(workflow=name, context=context)
+        pending = {step.name: step for step in plan}
+        done: Set[str] = set()
+        failure: Optional[BaseException] = None
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name) as executor:
+            running = {}
+            while pending or running:
+                if failure is None:
+                    for step in [s for s in pending.values() if s.depends_on <= done]:
+                        del pending[step.name]
+                        if not evaluate_condition(step.condition, context):
+                            run.status[step.name] = 'skipped'
+                            run.timings[step.name] = 0.0
+                            done.add(step.name)
+                            logger.info(f"{name}.{step.name} skipped (condition '{step.condition}' is false)")
+                            continue
+                        # copy_context: context-local state (the job's retry budget) follows the step
+                        running[executor.submit(contextvars.copy_context().run, self.run_step, step, context)] = step
+                    if not running and pending and not any(s.depends_on <= done for s in pending.values()):
+                        break  # everything left depends on skipped-only chains that cannot start
+                    if not running:
+                        continue
+                elif not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    try:
+                        outputs, elapsed = future.result()
+                    except Exception as e:
+                        run.status[step.name] = 'failed'
+                        logger.error(f"{name}.{step.name} failed: {e}")
+                        failure = failure or e
+                        continue
+                    context.update(outputs or {})
+                    run.status[step.name] = 'completed'
+                    run.timings[step.name] = elapsed
+                    done.add(step.name)
+                    logger.debug(f"{name}.{step.name} completed in {elapsed:.3f}s")
+
+        run.wall_time = time.perf_counter() - started
+        if failure is not None:
+            if getattr(failure, 'delay', None) is not None:
+                raise failure
+            raise WorkflowError(f"Workflow {name} failed: {failure}") from failure
+        logger.info(
+            f"Workflow {name} finished in {run.wall_time:.3f}s ("
+            + ', '.join(f"{s}={t:.3f}s" for s, t in run.timings.items()) + ")"
+        )
+        return run
+
+    def run_step(self, step: CompiledStep, context: Dict[str, Any]):
+        """Call a step's handler with its declared inputs; returns (outputs, seconds)"""
+        inputs = {i: context.get(i) for i in step.inputs if i != ALL_PREVIOUS}
+        started = time.perf_counter()
+        try:
+            outputs = self.handlers[step.type](step.definition, inputs, context)
+        except Exception as e:
+            if self.observer is not None:
+                self.observer(step, context, time.perf_counter() - started, e)
+            raise
+        elapsed = time.perf_counter() - started
+        if self.observer is not None:
+            self.observer(step, context, elapsed, None)
+        return outputs, elapsed